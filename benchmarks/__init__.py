@@ -0,0 +1 @@
+"""Benchmarks of the formatting and rendering hot path."""
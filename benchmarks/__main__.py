@@ -0,0 +1,201 @@
+"""Benchmark formatting and rendering, offline.
+
+Run from the repository root:
+
+    python -m benchmarks
+    python -m benchmarks --save benchmarks/baseline.json
+    python -m benchmarks --compare benchmarks/baseline.json
+
+With `--compare`, exits with status 1 if any benchmark's median is slower than
+the baseline by more than `--threshold`.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import pathlib
+import sys
+from typing import TYPE_CHECKING, Any
+
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+
+from benchmarks import corpus, harness
+from dicc.display.collegiate import Collegiate
+from dicc.display.common import clear_format_cache, format_text
+from dicc.display.format_element import format_dt
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from dicc.responses.collegiate import CollegiateResponseItem, DefiningText
+
+
+def _defining_texts(entry: CollegiateResponseItem) -> Iterator[DefiningText]:
+    """Yield the defining text of each sense in an entry."""
+    for definition in entry.get("def", []):
+        for sense_sequence in definition.get("sseq", []):
+            for item in sense_sequence:
+                senses: list[Any] = item[1] if item[0] == "pseq" else [item]
+                for kind, sense in senses:
+                    if kind == "bs":
+                        sense = sense["sense"]
+                    if kind in ("sense", "bs") and "dt" in sense:
+                        yield sense["dt"]
+
+
+def _markup(entry: CollegiateResponseItem) -> Iterator[str]:
+    """Yield each string of markup in an entry, as passed to `format_text`."""
+    for dt in _defining_texts(entry):
+        items: list[Any] = dt
+        for kind, value in items:
+            if kind == "text":
+                yield value
+            elif kind == "vis":
+                yield from (vis["t"] for vis in value)
+
+    if date := entry.get("date"):
+        yield date
+
+
+def _render(width: int) -> Any:
+    """Return a function rendering an entry at `width`, discarding the output."""
+    console = Console(
+        file=io.StringIO(), width=width, color_system="truecolor", force_terminal=True
+    )
+
+    def render(item: Collegiate) -> None:
+        with console.capture():
+            console.print(item)
+
+    return render
+
+
+def benchmarks(
+    name: str, entries: list[CollegiateResponseItem], widths: list[int]
+) -> list[harness.Benchmark]:
+    """Return the benchmarks for one corpus."""
+    items = [Collegiate.from_json(entry, index) for index, entry in enumerate(entries)]
+    markup = [markup for entry in entries for markup in _markup(entry)]
+
+    return [
+        harness.Benchmark(
+            f"{name}/format_text",
+            lambda markup: format_text(Text(markup)),
+            markup,
+            setup=clear_format_cache,  # Time formatting, not the memoized result
+        ),
+        harness.Benchmark(
+            f"{name}/format_text_memoized",
+            lambda markup: format_text(Text(markup)),
+            markup,
+        ),
+        harness.Benchmark(
+            f"{name}/format_dt",
+            format_dt,
+            [dt for entry in entries for dt in _defining_texts(entry)],
+        ),
+        harness.Benchmark(
+            f"{name}/from_json",
+            lambda entry: Collegiate.from_json(entry, 0),
+            entries,
+        ),
+        *(
+            harness.Benchmark(f"{name}/render@{width}", _render(width), items)
+            for width in widths
+        ),
+    ]
+
+
+def _table(
+    results: list[harness.Result],
+    baseline: dict[str, Any],
+    regressions: list[harness.Regression],
+) -> Table:
+    regressed = {regression.name for regression in regressions}
+
+    table = Table(title="Benchmarks", title_justify="left")
+    table.add_column("Benchmark", no_wrap=True)
+    table.add_column("Calls", justify="right")
+    table.add_column("Calls/s", justify="right")
+    table.add_column("p50 (µs)", justify="right")
+    table.add_column("p90 (µs)", justify="right")
+    table.add_column("p99 (µs)", justify="right")
+    table.add_column("vs baseline", justify="right")
+
+    for result in results:
+        change = ""
+        if previous := baseline.get(result.name):
+            ratio = result.percentile(50) / previous["p50"] - 1
+            style = "red" if result.name in regressed else ""
+            change = f"[{style}]{ratio:+.1%}[/]" if style else f"{ratio:+.1%}"
+
+        table.add_row(
+            result.name,
+            str(len(result.samples)),
+            f"{result.throughput:,.0f}",
+            f"{result.percentile(50):.1f}",
+            f"{result.percentile(90):.1f}",
+            f"{result.percentile(99):.1f}",
+            change,
+        )
+
+    return table
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmarks, and return the exit status."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument(
+        "--corpus", choices=("synthetic", "recorded", "all"), default="all"
+    )
+    parser.add_argument("--entries", type=int, default=50, help="synthetic entries")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--responses",
+        type=pathlib.Path,
+        default=corpus.RESPONSES_PATH,
+        help="directory of recorded response bodies",
+    )
+    parser.add_argument("--widths", default="40,80,120", help="console widths")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--filter", default="", help="only run matching benchmarks")
+    parser.add_argument("--save", type=pathlib.Path, help="write a baseline")
+    parser.add_argument("--compare", type=pathlib.Path, help="read a baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="allowed median slowdown"
+    )
+    args = parser.parse_args(argv)
+
+    widths = [int(width) for width in args.widths.split(",")]
+
+    corpora: dict[str, list[CollegiateResponseItem]] = {}
+    if args.corpus in ("synthetic", "all"):
+        corpora["synthetic"] = corpus.synthetic_corpus(args.entries, args.seed)
+    if args.corpus in ("recorded", "all"):
+        if recorded := corpus.recorded_corpus(args.responses):
+            corpora["recorded"] = recorded
+        elif args.corpus == "recorded":
+            parser.error(f"No Collegiate entries recorded in {args.responses}")
+
+    results = [
+        harness.run(benchmark, args.rounds)
+        for name, entries in corpora.items()
+        for benchmark in benchmarks(name, entries, widths)
+        if args.filter in benchmark.name and benchmark.inputs
+    ]
+
+    baseline = harness.load_baseline(args.compare) if args.compare else {}
+    regressions = harness.compare(results, baseline, args.threshold)
+
+    Console().print(_table(results, baseline, regressions))
+
+    if args.save:
+        harness.save_baseline(args.save, results)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""Collegiate payloads to benchmark against.
+
+Synthetic payloads are generated from a seed, and recorded payloads are response
+bodies kept in `benchmarks/responses`, so every run on every machine sees the same
+corpus. Record others from a `dicc` cache database with:
+
+    python -m benchmarks.corpus WORD...
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import random
+import sqlite3
+import sys
+from typing import TYPE_CHECKING, Any
+
+from dicc import cache
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from dicc.responses.collegiate import CollegiateResponseItem
+
+RESPONSES_PATH = pathlib.Path(__file__).parent / "responses"
+
+_WORDS = (
+    "run walk sprint flee gait steady ground flight spring step bus catch swift "
+    "pace course stream flow motion travel journey pass cross carry follow lead"
+).split()
+
+# Markup wrapped around, or placed between, words of defining text
+_PAIRS = ("b", "it", "sc", "wi", "phrase", "qword", "parahw")
+_BRACKETS = ("gloss", "dx_def")
+_LINKS = ("sx", "dxt", "a_link", "d_link", "i_link", "et_link", "mat")
+
+
+def _phrase(rng: random.Random, length: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(length))
+
+
+def _markup(rng: random.Random, length: int) -> str:
+    """Return defining text, with roughly one tag every three words."""
+    pieces = ["{bc}"]
+
+    for _ in range(length):
+        word = rng.choice(_WORDS)
+
+        match rng.randrange(9):
+            case 0:
+                tag = rng.choice(_PAIRS)
+                pieces.append(f"{{{tag}}}{word}{{/{tag}}}")
+            case 1:
+                tag = rng.choice(_BRACKETS)
+                pieces.append(f"{{{tag}}}{_phrase(rng, 3)}{{/{tag}}}")
+            case 2:
+                tag = rng.choice(_LINKS)
+                pieces.append(f"{{{tag}|{word}||}}")
+            case 3:
+                pieces.append(f"{{ldquo}}{word}{{rdquo}}")
+            case _:
+                pieces.append(word)
+
+    return " ".join(pieces)
+
+
+def _sense(rng: random.Random, number: int, letter: str) -> list[Any]:
+    dt: list[Any] = [["text", _markup(rng, rng.randint(6, 24))]]
+
+    if rng.random() < 0.5:
+        vis = {"t": f"{{it}}{_phrase(rng, 1)}{{/it}} {_phrase(rng, 6)}"}
+        if rng.random() < 0.5:
+            vis["aq"] = {"auth": "A. Writer"}  # type: ignore [assignment]
+        dt.append(["vis", [vis]])
+
+    if rng.random() < 0.2:
+        note = f"often used with {{it}}{_phrase(rng, 1)}{{/it}}"
+        dt.append(["uns", [[["text", note]]]])
+
+    return ["sense", {"sn": f"{number} {letter}", "dt": dt}]
+
+
+def synthetic_entry(rng: random.Random, index: int) -> CollegiateResponseItem:
+    """Return one generated entry, shaped like a Collegiate response item."""
+    headword = rng.choice(_WORDS)
+
+    sseq = [
+        [_sense(rng, number, letter) for letter in "abc"[: rng.randint(1, 3)]]
+        for number in range(1, rng.randint(2, 6))
+    ]
+
+    entry = {
+        "meta": {
+            "id": f"{headword}:{index + 1}",
+            "stems": [headword, f"{headword}s"],
+            "offensive": False,
+        },
+        "hwi": {"hw": headword, "prs": [{"mw": headword}]},
+        "fl": rng.choice(("verb", "noun", "adjective")),
+        "def": [{"vd": "intransitive verb", "sseq": sseq}],
+        "date": f"before 12th century{{ds|i|{rng.randint(1, 3)}|a|}}",
+        "shortdef": [_phrase(rng, 5) for _ in range(3)],
+    }
+
+    # I promise this is OK, mypy
+    item: CollegiateResponseItem = entry  # type: ignore [assignment]
+    return item
+
+
+def synthetic_corpus(count: int, seed: int = 0) -> list[CollegiateResponseItem]:
+    """Return `count` generated entries."""
+    rng = random.Random(seed)
+
+    return [synthetic_entry(rng, index) for index in range(count)]
+
+
+def recorded_corpus(
+    directory: pathlib.Path = RESPONSES_PATH,
+) -> list[CollegiateResponseItem]:
+    """Return the Collegiate entries of each recorded response, in file name order.
+
+    Lists of alternate search terms are skipped.
+    """
+    entries: list[CollegiateResponseItem] = []
+
+    for path in sorted(directory.glob("*.json")):
+        items: list[Any] = json.loads(path.read_bytes())
+        entries.extend(item for item in items if not isinstance(item, str))
+
+    return entries
+
+
+def record_responses(
+    db: pathlib.Path, words: Sequence[str], directory: pathlib.Path = RESPONSES_PATH
+) -> list[str]:
+    """Copy the dictionary responses cached for `words` into `directory`.
+
+    The database is opened read only. Returns the words that were not cached.
+    """
+    con = sqlite3.connect(f"file:{db}?mode=ro", uri=True)
+    missing = []
+
+    try:
+        for word in words:
+            row = con.execute(
+                "SELECT response, codec FROM queries WHERE cache_key = ?",
+                (cache.cache_key(word, "dictionary"),),
+            ).fetchone()
+
+            if row is None:
+                missing.append(word)
+                continue
+
+            response, codec = row
+            items = json.loads(cache.decompress(response, codec))
+            path = directory / f"{cache.normalize_word(word)}.json"
+            path.write_text(json.dumps(items, ensure_ascii=False, indent=1) + "\n")
+    finally:
+        con.close()
+
+    return missing
+
+
+def default_database() -> pathlib.Path:
+    """Return the path of the user's cache database."""
+    return cache.CACHE_PATH / "dicc.db"
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Record the cached responses of some words, and return the exit status."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.corpus", description=__doc__
+    )
+    parser.add_argument("words", nargs="+")
+    parser.add_argument(
+        "--database",
+        type=pathlib.Path,
+        default=default_database(),
+        help="cache database to read responses from",
+    )
+    args = parser.parse_args(argv)
+
+    if missing := record_responses(args.database, args.words):
+        print(f"Not cached: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Time benchmarks, and compare their results against a baseline."""
+from __future__ import annotations
+
+import gc
+import json
+import statistics
+import time
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional
+
+from attrs import define
+
+if TYPE_CHECKING:
+    import pathlib
+    from collections.abc import Callable, Sequence
+
+
+class Benchmark(NamedTuple):
+    """A function, timed once for each of its inputs.
+
+    `setup`, if any, runs before each call, untimed.
+    """
+
+    name: str
+    function: Callable[[Any], object]
+    inputs: Sequence[Any]
+    setup: Optional[Callable[[], object]] = None
+
+
+@define
+class Result:
+    """Timings of one benchmark, in nanoseconds per call."""
+
+    name: str
+    samples: list[int]
+
+    @property
+    def throughput(self) -> float:
+        """Calls per second."""
+        return len(self.samples) / (sum(self.samples) / 1e9)
+
+    def percentile(self, percent: int) -> float:
+        """Return the `percent`th percentile, in microseconds."""
+        cuts = statistics.quantiles(self.samples, n=100, method="inclusive")
+        return cuts[percent - 1] / 1000
+
+    def to_dict(self) -> dict[str, float]:
+        """Return a summary of the timings, as stored in a baseline."""
+        return {
+            "calls": len(self.samples),
+            "throughput": self.throughput,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+
+def run(benchmark: Benchmark, rounds: int = 5, warmup: int = 1) -> Result:
+    """Time each call of a benchmark, over `rounds` passes of its inputs.
+
+    The garbage collector is paused while timing, so collections triggered by
+    earlier benchmarks do not land in later ones.
+    """
+    function = benchmark.function
+    setup = benchmark.setup or (lambda: None)
+
+    for _ in range(warmup):
+        for value in benchmark.inputs:
+            setup()
+            function(value)
+
+    samples = []
+    gc.collect()
+    gc.disable()
+
+    try:
+        for _ in range(rounds):
+            for value in benchmark.inputs:
+                setup()
+                start = time.perf_counter_ns()
+                function(value)
+                samples.append(time.perf_counter_ns() - start)
+    finally:
+        gc.enable()
+
+    return Result(benchmark.name, samples)
+
+
+class Regression(NamedTuple):
+    """A benchmark slower than its baseline."""
+
+    name: str
+    baseline: float  # Median, in microseconds
+    current: float
+    change: float  # Relative to the baseline
+
+
+def compare(
+    results: Sequence[Result], baseline: dict[str, Any], threshold: float
+) -> list[Regression]:
+    """Return the benchmarks whose median is `threshold` slower than the baseline.
+
+    Benchmarks missing from the baseline are skipped.
+    """
+    regressions = []
+
+    for result in results:
+        if (previous := baseline.get(result.name)) is None:
+            continue
+
+        current = result.percentile(50)
+        change = current / previous["p50"] - 1
+        if change > threshold:
+            regression = Regression(result.name, previous["p50"], current, change)
+            regressions.append(regression)
+
+    return regressions
+
+
+def load_baseline(path: pathlib.Path) -> dict[str, Any]:
+    """Read a baseline written by `save_baseline`."""
+    with open(path, encoding="utf-8") as file:
+        baseline: dict[str, Any] = json.load(file)["results"]
+        return baseline
+
+
+def save_baseline(path: pathlib.Path, results: Sequence[Result]) -> None:
+    """Write the summary of each result, to compare later runs against."""
+    data = {"results": {result.name: result.to_dict() for result in results}}
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2)
+        file.write("\n")
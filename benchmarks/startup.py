@@ -0,0 +1,250 @@
+"""Time how long CLI commands take to start, against a budget.
+
+Each command runs in a fresh interpreter, with an empty home directory holding
+one cached word, so a search is answered by the cache. Budgets are multiples of
+a bare interpreter's start, timed first on the same machine, so they hold on
+slower machines too. Run from the repository root:
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --imports 10
+
+Exits with status 1 if any command's median is over its budget, scaled by
+`--scale`.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+from typing import TYPE_CHECKING, NamedTuple
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks import corpus, harness
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+# Runs the CLI like its entry point, without exiting before returning
+_PROBE = """\
+import sys
+from dicc.cli.main import app
+try:
+    app(sys.argv[1:], prog_name="dicc")
+except SystemExit:
+    pass
+"""
+
+CACHED_WORD = "run"
+
+
+class Command(NamedTuple):
+    """CLI arguments, and the most bare interpreter starts its median may take."""
+
+    name: str
+    arguments: list[str]
+    budget: float
+
+
+COMMANDS = [
+    Command("--help", ["--help"], 20),
+    Command("cache clear", ["cache", "clear"], 16),
+    Command("cache stats", ["cache", "stats"], 16),
+    Command("cache show", ["cache", "show"], 16),
+    Command("search (cache hit)", ["search", CACHED_WORD, "--no-daemon"], 21),
+]
+
+
+@contextlib.contextmanager
+def home_config(home: pathlib.Path) -> Iterator[None]:
+    """Read and snapshot the configuration in `home`, as the commands run there do.
+
+    The configuration paths were bound to the real home directory on import.
+    """
+    from dicc.config import main as config
+
+    saved = config.SNAPSHOT_PATH, config.USER_CONFIG_LOCATIONS, config._config
+
+    config.SNAPSHOT_PATH = home / ".cache" / "dicc" / "config.pickle"
+    config.USER_CONFIG_LOCATIONS = [
+        home / ".config" / "dicc" / config.USER_CONFIG_FILENAME,
+        home / f".{config.USER_CONFIG_FILENAME}",
+    ]  # As without XDG_CONFIG_HOME, which `environment` leaves out
+    config._config = None
+
+    try:
+        yield
+    finally:
+        config.SNAPSHOT_PATH, config.USER_CONFIG_LOCATIONS, config._config = saved
+
+
+def prepare_home(home: pathlib.Path) -> None:
+    """Create a cache in `home`, holding only `CACHED_WORD`."""
+    from dicc import cache
+    from dicc.query.common import create_query
+
+    # Eviction on insert reads the configuration
+    with home_config(home):
+        con = cache.connect(cache.create_cache_path(home / ".cache" / "dicc"))
+
+        try:
+            cache.clear_cache(con)
+            response = json.dumps(corpus.synthetic_corpus(1)).encode()
+            cache.insert_row(con, create_query(CACHED_WORD, "dictionary"), response)
+        finally:
+            con.close()
+
+
+def environment(home: pathlib.Path) -> dict[str, str]:
+    """Return the environment to run commands in, with `home` as home directory."""
+    variables = os.environ.copy()
+    variables.update(HOME=str(home), COLUMNS="80", TERM="dumb")
+    variables.pop("XDG_CONFIG_HOME", None)  # Only the default configuration
+
+    return variables
+
+
+def run_command(
+    arguments: Sequence[str], home: pathlib.Path, importtime: bool = False
+) -> subprocess.CompletedProcess[str]:
+    """Run the CLI with `arguments` in a new interpreter, and wait for it."""
+    options = ["-X", "importtime"] if importtime else []
+    # A command that reads input must not wait for ours
+    return subprocess.run(
+        [sys.executable, *options, "-c", _PROBE, *arguments],
+        env=environment(home),
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+def time_bare(home: pathlib.Path, rounds: int) -> harness.Result:
+    """Time `rounds` starts of an interpreter that runs nothing, in nanoseconds."""
+    samples = []
+
+    for _ in range(rounds):
+        start = time.perf_counter_ns()
+        subprocess.run(
+            [sys.executable, "-c", "pass"],
+            env=environment(home),
+            stdin=subprocess.DEVNULL,
+            check=False,
+        )
+        samples.append(time.perf_counter_ns() - start)
+
+    return harness.Result("python -c pass", samples)
+
+
+def time_command(command: Command, home: pathlib.Path, rounds: int) -> harness.Result:
+    """Time `rounds` starts of a command, in nanoseconds each."""
+    samples = []
+
+    for _ in range(rounds):
+        prepare_home(home)  # Untimed, and filled again after `cache clear`
+
+        start = time.perf_counter_ns()
+        run_command(command.arguments, home)
+        samples.append(time.perf_counter_ns() - start)
+
+    return harness.Result(command.name, samples)
+
+
+def slowest_imports(
+    arguments: Sequence[str], home: pathlib.Path, count: int
+) -> list[tuple[str, float]]:
+    """Return the `count` top level imports taking longest, in milliseconds."""
+    stderr = run_command(arguments, home, importtime=True).stderr
+    imports = []
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, module = line.removeprefix("import time:").split("|")
+        if not module.startswith("  "):  # Imported directly, not by another module
+            imports.append((module.strip(), int(cumulative) / 1000))
+
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:count]
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the startup benchmarks, and return the exit status."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.startup", description=__doc__
+    )
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--filter", default="", help="only run matching commands")
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiply every budget by this"
+    )
+    parser.add_argument(
+        "--imports", type=int, default=0, help="show the slowest imports of each"
+    )
+    args = parser.parse_args(argv)
+
+    commands = [command for command in COMMANDS if args.filter in command.name]
+    over_budget = []
+
+    table = Table(title="Startup", title_justify="left")
+    table.add_column("Command", no_wrap=True)
+    table.add_column("p50 (ms)", justify="right")
+    table.add_column("p90 (ms)", justify="right")
+    table.add_column("Bare starts", justify="right")
+    table.add_column("Budget", justify="right")
+
+    console = Console()
+
+    with tempfile.TemporaryDirectory() as directory:
+        home = pathlib.Path(directory)
+
+        bare = time_bare(home, args.rounds)
+        bare_median = bare.percentile(50) / 1000
+        table.add_row(
+            bare.name,
+            f"{bare_median:.1f}",
+            f"{bare.percentile(90) / 1000:.1f}",
+            "1.0",
+            "",
+        )
+
+        for command in commands:
+            result = time_command(command, home, args.rounds)
+            median = result.percentile(50) / 1000
+            starts = median / bare_median
+            budget = command.budget * args.scale
+
+            style = "red" if starts > budget else ""
+            if starts > budget:
+                over_budget.append(command.name)
+
+            table.add_row(
+                command.name,
+                f"{median:.1f}",
+                f"{result.percentile(90) / 1000:.1f}",
+                f"[{style}]{starts:.1f}[/]" if style else f"{starts:.1f}",
+                f"{budget:.1f}",
+            )
+
+            if args.imports:
+                prepare_home(home)
+                imports = slowest_imports(command.arguments, home, args.imports)
+                console.print(f"[bold]{command.name}[/]: slowest imports")
+                for module, milliseconds in imports:
+                    console.print(f"  {milliseconds:8.1f} ms  {module}")
+
+    console.print(table)
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,87 @@
 """The caching module."""
 from __future__ import annotations
 
+import calendar
 import datetime
+import functools
+import hashlib
+import json
 import pathlib
+import random
 import sqlite3
-from typing import TYPE_CHECKING, Literal, NamedTuple
+import time
+import unicodedata
+import zlib
+from typing import (
+    TYPE_CHECKING,
+    Concatenate,
+    Literal,
+    NamedTuple,
+    ParamSpec,
+    TypeVar,
+)
 
-if TYPE_CHECKING:
-    from typing import Optional
+from dicc.config.main import get_config
 
-import httpx
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+    from typing import Any, Optional, TextIO
 
-from dicc.query.common import MerriamWebsterQuery
+    from dicc.query.common import MerriamWebsterQuery
 
 CACHE_PATH = pathlib.Path().home() / ".cache" / "dicc"
 
+P = ParamSpec("P")
+R = TypeVar("R")
+
+BUSY_TIMEOUT = 5.0  # Seconds to wait for a lock held by another process
+
+# Set on every connection, as they are not stored in the database
+_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",  # Readers and a writer don't block each other
+    "PRAGMA synchronous = NORMAL",  # Safe with WAL, without syncing every commit
+    "PRAGMA cache_size = -8192",  # In KiB
+    "PRAGMA mmap_size = 67108864",  # In bytes
+)
+
+# Seconds to back off between attempts, when a lock can't be waited for
+_RETRY_DELAYS = (0.05, 0.1, 0.2, 0.4, 0.8, 1.6)
+
+# Columns of `queries`, in `CacheRecord` order, then the response codec
+_COLUMNS = (
+    "word, created_timestamp, search_method, cache_key, response, "
+    "accessed_timestamp, size, codec"
+)
+
+# Sets every column of an existing row, bar its key, from the row being inserted
+_UPDATE_COLUMNS = ", ".join(
+    f"{column} = excluded.{column}"
+    for column in _COLUMNS.split(", ")
+    if column != "cache_key"
+)
+
+# Most bound parameters in one statement, below SQLite's lowest default limit
+_MAX_PARAMETERS = 900
+
+Codec = Literal["identity", "zlib"]
+
+WordOrder = Literal["word", "age", "hits"]
+
+# Indexed orders to list cached words in
+_WORD_ORDERS: dict[WordOrder, str] = {
+    "word": "word",
+    "age": "created_timestamp DESC",  # Newest first
+    "hits": "hit_count DESC",  # Most searched first
+}
+
+CODEC: Codec = "zlib"  # Codec for new responses
+
+# Merriam-Webster reference queried by each search method
+_REFERENCES = {
+    "dictionary": "collegiate",
+    "thesaurus": "thesaurus",
+}
+
 
 class CacheRecord(NamedTuple):
     """Query data payload, also equivalent to a row in the cache DB."""
@@ -22,8 +89,30 @@ class CacheRecord(NamedTuple):
     word: str  # Our searched word
     created_timestamp: datetime.datetime
     search_method: Literal["dictionary", "thesaurus"]
-    query_url: httpx.URL
-    response_text: str  # TODO: This is our JSON response
+    cache_key: str
+    response: bytes  # Raw JSON response body, as sent by the API
+    accessed_timestamp: datetime.datetime
+    size: int  # Stored bytes, counted against `max_size`
+
+
+class RenderKey(NamedTuple):
+    """What the rendered output of a search depends on, besides its response."""
+
+    cache_key: str
+    word: str  # As searched, shown in the panel title
+    width: int
+    color_system: str  # Empty for no color
+    style_hash: str
+
+
+class CacheStats(NamedTuple):
+    """Summary of the cache table."""
+
+    entries: int
+    total_size: int  # Bytes
+    max_size: int  # Bytes
+    hits: int  # Searches answered by the cache
+    schema_version: int
 
 
 def adapt_datetime_utc(value: datetime.datetime) -> str:
@@ -31,13 +120,95 @@ def adapt_datetime_utc(value: datetime.datetime) -> str:
     return value.isoformat()
 
 
-def adapt_url(value: httpx.URL) -> str:
-    """Convert `URL` object to SQL text."""
-    return str(value)
+sqlite3.register_adapter(datetime.datetime, adapt_datetime_utc)
+
 
+def compress(data: bytes, codec: Codec = CODEC) -> bytes:
+    """Encode a response for storage."""
+    match codec:
+        case "identity":
+            return data
+        case "zlib":
+            return zlib.compress(data)
+        case _:
+            raise ValueError(f"Unknown codec: {codec}")
 
-sqlite3.register_adapter(datetime.datetime, adapt_datetime_utc)
-sqlite3.register_adapter(httpx.URL, adapt_url)
+
+def decompress(data: bytes, codec: Codec) -> bytes:
+    """Decode a stored response."""
+    match codec:
+        case "identity":
+            return data
+        case "zlib":
+            return zlib.decompress(data)
+        case _:
+            raise ValueError(f"Unknown codec: {codec}")
+
+
+def _make_record(data: tuple[Any, ...]) -> CacheRecord:
+    """Construct a `CacheRecord` from a row of `_COLUMNS`."""
+    word, created, method, key, stored, accessed, size, codec = data
+    response = decompress(stored, codec)
+
+    return CacheRecord(word, created, method, key, response, accessed, size)
+
+
+def response_hash(response: bytes) -> str:
+    """Return a digest identifying a raw response."""
+    return hashlib.blake2b(response, digest_size=16).hexdigest()
+
+
+def normalize_word(word: str) -> str:
+    """Normalize a searched word, so equivalent searches share a cache entry."""
+    return " ".join(unicodedata.normalize("NFC", word).lower().split())
+
+
+def cache_key(word: str, method: str) -> str:
+    """Return the cache key for a search, independent of the API key used."""
+    return f"{_REFERENCES.get(method, method)}/{normalize_word(word)}"
+
+
+def entry_stems(word: str, response: bytes) -> set[str]:
+    """Return the stems of the entries for `word` in a raw response.
+
+    Only entries whose headword is `word` are used, so a phrase listed in the
+    response, such as "run across" for "run", is not answered with it.
+    """
+    try:
+        entries = json.loads(response)
+    except ValueError:
+        return set()
+
+    return json_stems(word, entries)
+
+
+def json_stems(word: str, entries: Iterable[Any]) -> set[str]:
+    """Return the stems of the entries for `word` in a decoded response."""
+    normalized = normalize_word(word)
+    stems: set[str] = set()
+
+    for entry in entries:
+        if not isinstance(entry, dict):  # Alternate search terms
+            continue
+
+        meta = entry.get("meta", {})
+        headword = meta.get("id", "").split(":")[0]
+
+        if normalize_word(headword) == normalized:
+            stems.update(meta.get("stems", []))
+
+    return stems
+
+
+def _stem_rows(
+    query: MerriamWebsterQuery, stems: Iterable[str]
+) -> list[tuple[str, str]]:
+    """Return `(stem_key, cache_key)` rows indexing a response by its stems."""
+    return [
+        (stem_key, query.cache_key)
+        for stem in stems
+        if (stem_key := cache_key(stem, query.method)) != query.cache_key
+    ]
 
 
 def create_cache_path(cache_path: pathlib.Path) -> pathlib.Path:
@@ -48,37 +219,543 @@ def create_cache_path(cache_path: pathlib.Path) -> pathlib.Path:
     return db
 
 
+def _is_locked(error: sqlite3.OperationalError) -> bool:
+    message = str(error)
+    return "database is locked" in message or "database is busy" in message
+
+
+def retry_locked(
+    function: Callable[Concatenate[sqlite3.Connection, P], R],
+) -> Callable[Concatenate[sqlite3.Connection, P], R]:
+    """Retry a function of the cache with backoff, while another process locks it.
+
+    The busy timeout already waits for most locks. SQLite gives up without waiting
+    when waiting could deadlock, such as when a read transaction needs to write
+    after another process has written. A call nested in a transaction is not
+    retried, as the failure rolled back the whole transaction.
+    """
+
+    @functools.wraps(function)
+    def retry(con: sqlite3.Connection, /, *args: P.args, **kwargs: P.kwargs) -> R:
+        if con.in_transaction:
+            return function(con, *args, **kwargs)
+
+        for delay in _RETRY_DELAYS:
+            try:
+                return function(con, *args, **kwargs)
+            except sqlite3.OperationalError as error:
+                if not _is_locked(error):
+                    raise
+
+            time.sleep(delay * random.uniform(0.5, 1.5))  # Don't retry in step
+
+        return function(con, *args, **kwargs)
+
+    return retry
+
+
+def connect(
+    db: Optional[pathlib.Path] = None, check_same_thread: bool = True
+) -> sqlite3.Connection:
+    """Open the cache database, in `CACHE_PATH` by default, at the current schema.
+
+    Connections use write-ahead logging, so many processes can read while one
+    writes, and wait up to `BUSY_TIMEOUT` for another process to finish writing.
+    """
+    if db is None:
+        db = create_cache_path(CACHE_PATH)
+
+    con = sqlite3.connect(
+        db, timeout=BUSY_TIMEOUT, check_same_thread=check_same_thread
+    )
+
+    try:
+        _configure(con)
+        create_database(con)
+    except BaseException:
+        con.close()
+        raise
+
+    return con
+
+
+@retry_locked
+def _configure(con: sqlite3.Connection) -> None:
+    """Set the pragmas of a new connection."""
+    for pragma in _PRAGMAS:
+        con.execute(pragma)
+
+
+def _create_queries(con: sqlite3.Connection) -> None:
+    """Create the original word query table."""
+    con.execute(
+        """CREATE TABLE IF NOT EXISTS queries (
+        "word" TEXT NOT NULL,
+        "created_timestamp" TEXT NOT NULL,
+        "search_method" TEXT NOT NULL,
+        "query_url" TEXT NOT NULL PRIMARY KEY,
+        "response_text" TEXT NOT NULL
+        )
+        """
+    )
+
+
+def _create_size_triggers(con: sqlite3.Connection) -> None:
+    """Keep `cache_info.total_size` equal to the total size of `queries`."""
+    con.execute(
+        """CREATE TRIGGER queries_insert_size AFTER INSERT ON queries
+        BEGIN
+            UPDATE cache_info SET total_size = total_size + NEW.size;
+        END"""
+    )
+    con.execute(
+        """CREATE TRIGGER queries_delete_size AFTER DELETE ON queries
+        BEGIN
+            UPDATE cache_info SET total_size = total_size - OLD.size;
+        END"""
+    )
+    con.execute(
+        """CREATE TRIGGER queries_update_size AFTER UPDATE OF size ON queries
+        BEGIN
+            UPDATE cache_info SET total_size = total_size - OLD.size + NEW.size;
+        END"""
+    )
+
+
+def _add_eviction_columns(con: sqlite3.Connection) -> None:
+    """Track the size and last access of each query, and the total cache size."""
+    con.execute(
+        """ALTER TABLE queries
+        ADD COLUMN "accessed_timestamp" TEXT NOT NULL DEFAULT ''"""
+    )
+    con.execute('ALTER TABLE queries ADD COLUMN "size" INTEGER NOT NULL DEFAULT 0')
+    con.execute(
+        """UPDATE queries SET
+        accessed_timestamp = created_timestamp,
+        size = length(CAST(response_text AS BLOB))"""
+    )
+
+    con.execute("CREATE INDEX queries_accessed ON queries (accessed_timestamp)")
+    con.execute("CREATE INDEX queries_created ON queries (created_timestamp)")
+
+    # Running total, so eviction never has to sum the table
+    con.execute(
+        """CREATE TABLE cache_info (
+        "id" INTEGER NOT NULL PRIMARY KEY CHECK ("id" = 0),
+        "total_size" INTEGER NOT NULL
+        )
+        """
+    )
+    con.execute(
+        """INSERT INTO cache_info (id, total_size)
+        SELECT 0, COALESCE(SUM(size), 0) FROM queries"""
+    )
+    _create_size_triggers(con)
+
+
+def _key_by_word(con: sqlite3.Connection) -> None:
+    """Key queries by reference and normalized word, rather than by API URL.
+
+    The URL contains the API key, so rotating or sharing keys missed the cache.
+    Queries for the same key are merged, keeping the newest response.
+    """
+    con.create_function("dicc_cache_key", 2, cache_key, deterministic=True)
+
+    con.execute(
+        """CREATE TABLE queries_by_key (
+        "word" TEXT NOT NULL,
+        "created_timestamp" TEXT NOT NULL,
+        "search_method" TEXT NOT NULL,
+        "cache_key" TEXT NOT NULL PRIMARY KEY,
+        "response_text" TEXT NOT NULL,
+        "accessed_timestamp" TEXT NOT NULL,
+        "size" INTEGER NOT NULL
+        )
+        """
+    )
+    con.execute(
+        """INSERT OR REPLACE INTO queries_by_key
+        SELECT word, created_timestamp, search_method,
+            dicc_cache_key(word, search_method),
+            response_text, accessed_timestamp, size
+        FROM queries ORDER BY created_timestamp"""
+    )
+    con.execute("DROP TABLE queries")  # Also drops its indexes and triggers
+    con.execute("ALTER TABLE queries_by_key RENAME TO queries")
+
+    con.execute("CREATE INDEX queries_accessed ON queries (accessed_timestamp)")
+    con.execute("CREATE INDEX queries_created ON queries (created_timestamp)")
+    _create_size_triggers(con)
+    con.execute(
+        """UPDATE cache_info
+        SET total_size = (SELECT COALESCE(SUM(size), 0) FROM queries)"""
+    )
+
+
+def _compress_responses(con: sqlite3.Connection) -> None:
+    """Store responses as compressed blobs, with the codec used."""
+    con.create_function(
+        "dicc_compress",
+        1,
+        lambda text: compress(text.encode()),
+        deterministic=True,
+    )
+
+    con.execute(
+        """CREATE TABLE queries_compressed (
+        "word" TEXT NOT NULL,
+        "created_timestamp" TEXT NOT NULL,
+        "search_method" TEXT NOT NULL,
+        "cache_key" TEXT NOT NULL PRIMARY KEY,
+        "response" BLOB NOT NULL,
+        "accessed_timestamp" TEXT NOT NULL,
+        "size" INTEGER NOT NULL,
+        "codec" TEXT NOT NULL
+        )
+        """
+    )
+    con.execute(
+        """INSERT INTO queries_compressed
+        SELECT word, created_timestamp, search_method, cache_key,
+            dicc_compress(response_text), accessed_timestamp, 0, ?
+        FROM queries""",
+        (CODEC,),
+    )
+    con.execute("UPDATE queries_compressed SET size = length(response)")
+    con.execute("DROP TABLE queries")
+    con.execute("ALTER TABLE queries_compressed RENAME TO queries")
+
+    con.execute("CREATE INDEX queries_accessed ON queries (accessed_timestamp)")
+    con.execute("CREATE INDEX queries_created ON queries (created_timestamp)")
+    _create_size_triggers(con)
+    con.execute(
+        """UPDATE cache_info
+        SET total_size = (SELECT COALESCE(SUM(size), 0) FROM queries)"""
+    )
+
+
+def _index_stems(con: sqlite3.Connection) -> None:
+    """Index responses by the stems of their entries, such as "ran" for "run"."""
+    from dicc.query.common import MerriamWebsterQuery
+
+    con.execute(
+        """CREATE TABLE stems (
+        "stem_key" TEXT NOT NULL PRIMARY KEY,
+        "cache_key" TEXT NOT NULL
+        )
+        """
+    )
+    con.execute("CREATE INDEX stems_cache_key ON stems (cache_key)")
+    con.execute(
+        """CREATE TRIGGER queries_delete_stems AFTER DELETE ON queries
+        BEGIN
+            DELETE FROM stems WHERE cache_key = OLD.cache_key;
+        END"""
+    )
+
+    cur = con.execute(f"SELECT {_COLUMNS} FROM queries ORDER BY created_timestamp")
+    for row in cur.fetchall():
+        record = _make_record(row)
+        query = MerriamWebsterQuery(
+            record.word,
+            record.created_timestamp,
+            record.search_method,
+            record.cache_key,
+        )
+        con.executemany(
+            "INSERT OR REPLACE INTO stems VALUES (?, ?)",
+            _stem_rows(query, entry_stems(record.word, record.response)),
+        )
+
+
+def _add_rendered(con: sqlite3.Connection) -> None:
+    """Cache the rendered output of searches, per console width and style.
+
+    Outputs are removed with the response or stem they were rendered from, and
+    are only used while the response they were rendered from is still cached.
+    """
+    con.execute(
+        """CREATE TABLE rendered (
+        "cache_key" TEXT NOT NULL,
+        "word" TEXT NOT NULL,
+        "width" INTEGER NOT NULL,
+        "color_system" TEXT NOT NULL,
+        "style_hash" TEXT NOT NULL,
+        "response_hash" TEXT NOT NULL,
+        "output" BLOB NOT NULL,
+        "codec" TEXT NOT NULL,
+        PRIMARY KEY (cache_key, word, width, color_system, style_hash)
+        )
+        """
+    )
+    con.execute(
+        """CREATE TRIGGER queries_delete_rendered AFTER DELETE ON queries
+        BEGIN
+            DELETE FROM rendered WHERE cache_key = OLD.cache_key;
+        END"""
+    )
+    con.execute(
+        """CREATE TRIGGER stems_delete_rendered AFTER DELETE ON stems
+        BEGIN
+            DELETE FROM rendered WHERE cache_key = OLD.stem_key;
+        END"""
+    )
+
+
+def _add_api_usage(con: sqlite3.Connection) -> None:
+    """Count the requests sent to each reference every day, against its quota."""
+    con.execute(
+        """CREATE TABLE api_usage (
+        "day" TEXT NOT NULL,
+        "search_method" TEXT NOT NULL,
+        "requests" INTEGER NOT NULL,
+        PRIMARY KEY (day, search_method)
+        )
+        """
+    )
+
+
+def _index_words(con: sqlite3.Connection) -> None:
+    """Index queries by word, to list them in order without sorting the table."""
+    con.execute("CREATE INDEX queries_word ON queries (word)")
+
+
+def _add_hit_count(con: sqlite3.Connection) -> None:
+    """Count the searches answered by each query, to list the most searched."""
+    con.execute('ALTER TABLE queries ADD COLUMN "hit_count" INTEGER NOT NULL DEFAULT 0')
+    con.execute("CREATE INDEX queries_hits ON queries (hit_count DESC)")
+
+
+def _count_rendered_size(con: sqlite3.Connection) -> None:
+    """Count rendered output in `cache_info.total_size`, as responses are."""
+    con.execute('ALTER TABLE rendered ADD COLUMN "size" INTEGER NOT NULL DEFAULT 0')
+    con.execute("UPDATE rendered SET size = length(output)")
+    con.execute(
+        """UPDATE cache_info
+        SET total_size = total_size + (SELECT COALESCE(SUM(size), 0) FROM rendered)"""
+    )
+    con.execute(
+        """CREATE TRIGGER rendered_insert_size AFTER INSERT ON rendered
+        BEGIN
+            UPDATE cache_info SET total_size = total_size + NEW.size;
+        END"""
+    )
+    con.execute(
+        """CREATE TRIGGER rendered_delete_size AFTER DELETE ON rendered
+        BEGIN
+            UPDATE cache_info SET total_size = total_size - OLD.size;
+        END"""
+    )
+    con.execute(
+        """CREATE TRIGGER rendered_update_size AFTER UPDATE OF size ON rendered
+        BEGIN
+            UPDATE cache_info SET total_size = total_size - OLD.size + NEW.size;
+        END"""
+    )
+
+
+def _add_generation(con: sqlite3.Connection) -> None:
+    """Count the deletions from `queries`, so copies held elsewhere can be checked."""
+    con.execute(
+        'ALTER TABLE cache_info ADD COLUMN "generation" INTEGER NOT NULL DEFAULT 0'
+    )
+    con.execute(
+        """CREATE TRIGGER queries_delete_generation AFTER DELETE ON queries
+        BEGIN
+            UPDATE cache_info SET generation = generation + 1;
+        END"""
+    )
+
+
+def _count_replacements(con: sqlite3.Connection) -> None:
+    """Count responses replaced in place too, as by an upsert or an import."""
+    con.execute(
+        """CREATE TRIGGER queries_update_generation AFTER UPDATE OF response ON queries
+        BEGIN
+            UPDATE cache_info SET generation = generation + 1;
+        END"""
+    )
+
+
+# Schema migrations, in order. `PRAGMA user_version` is the number applied.
+_MIGRATIONS = [
+    _create_queries,
+    _add_eviction_columns,
+    _key_by_word,
+    _compress_responses,
+    _index_stems,
+    _add_rendered,
+    _add_api_usage,
+    _index_words,
+    _add_hit_count,
+    _count_rendered_size,
+    _add_generation,
+    _count_replacements,
+]
+
+
+@retry_locked
 def create_database(con: sqlite3.Connection) -> None:
-    """Create the cache database tables."""
-    # Word query table
+    """Create the cache database tables, or migrate them to the current schema."""
+    (version,) = con.execute("PRAGMA user_version").fetchone()
+    if version >= len(_MIGRATIONS):
+        return
+
     with con:
-        con.execute(
-            """CREATE TABLE IF NOT EXISTS queries (
-            "word" TEXT NOT NULL,
-            "created_timestamp" TEXT NOT NULL,
-            "search_method" TEXT NOT NULL,
-            "query_url" TEXT NOT NULL PRIMARY KEY,
-            "response_text" TEXT NOT NULL
+        # Take the write lock first, so two processes don't both migrate
+        if not con.in_transaction:
+            con.execute("BEGIN IMMEDIATE")
+        (version,) = con.execute("PRAGMA user_version").fetchone()
+
+        for number, migration in enumerate(_MIGRATIONS[version:], start=version + 1):
+            migration(con)
+            con.execute(f"PRAGMA user_version = {number}")
+
+
+def _months_ago(now: datetime.datetime, months: int) -> datetime.datetime:
+    """Return the same moment `months` calendar months before `now`."""
+    year, month = divmod(now.year * 12 + now.month - 1 - months, 12)
+    day = min(now.day, calendar.monthrange(year, month + 1)[1])
+
+    return now.replace(year=year, month=month + 1, day=day)
+
+
+def expiry(max_age: Optional[int] = None) -> datetime.datetime:
+    """Return the creation time before which a query is too old to keep."""
+    if max_age is None:
+        max_age = get_config().cache["max_age"]
+
+    return _months_ago(datetime.datetime.now(), max_age)
+
+
+@retry_locked
+def evict(
+    con: sqlite3.Connection,
+    max_size: Optional[int] = None,
+    max_age: Optional[int] = None,
+) -> int:
+    """Evict queries older than `max_age`, then the least recently used.
+
+    Queries, and the output rendered from them, are evicted until the cache fits
+    within `max_size`. Both limits
+    default to the user configuration, in megabytes and months. Only the indexed
+    ends of the table are read, so this is cheap to run on every insert.
+
+    Returns the number of evicted queries.
+    """
+    if max_size is None:
+        max_size = get_config().cache["max_size"]
+    budget = max_size * 1024 * 1024
+
+    with con:
+        cur = con.execute(
+            "DELETE FROM queries WHERE created_timestamp < ?",
+            (expiry(max_age),),
+        )
+        evicted = cur.rowcount
+
+        (total_size,) = con.execute("SELECT total_size FROM cache_info").fetchone()
+        if total_size <= budget:
+            return evicted
+
+        # Deleting a query also deletes the output rendered from it, by its own
+        # key or by its stems
+        lru_keys = []
+        cur = con.execute(
+            """SELECT cache_key, size + (
+                SELECT COALESCE(SUM(rendered.size), 0) FROM rendered
+                WHERE rendered.cache_key = queries.cache_key
+                OR rendered.cache_key IN (
+                    SELECT stem_key FROM stems
+                    WHERE stems.cache_key = queries.cache_key
+                )
             )
-            """
+            FROM queries ORDER BY accessed_timestamp"""
         )
+        for key, size in cur:
+            if total_size <= budget:
+                break
+            lru_keys.append((key,))
+            total_size -= size
+        cur.close()
+
+        con.executemany("DELETE FROM queries WHERE cache_key = ?", lru_keys)
+
+    return evicted + len(lru_keys)
+
+
+def get_stats(con: sqlite3.Connection) -> CacheStats:
+    """Return a summary of the cache table."""
+    with con:
+        entries, hits = con.execute(
+            "SELECT COUNT(*), COALESCE(SUM(hit_count), 0) FROM queries"
+        ).fetchone()
+        (total_size,) = con.execute("SELECT total_size FROM cache_info").fetchone()
+        (version,) = con.execute("PRAGMA user_version").fetchone()
+
+    max_size = get_config().cache["max_size"] * 1024 * 1024
+
+    return CacheStats(entries, total_size, max_size, hits, version)
+
+
+def get_generation(con: sqlite3.Connection) -> int:
+    """Return a number that changes whenever any process deletes or replaces a query.
+
+    Cleared, evicted and expired queries are all deleted.
+    """
+    (generation,) = con.execute("SELECT generation FROM cache_info").fetchone()
+
+    return int(generation)
 
 
 def get_cache(con: sqlite3.Connection) -> Optional[list[CacheRecord]]:
     """Get the entire cache table, if it contains any records."""
     with con:
-        cur = con.execute("SELECT * FROM queries")
+        cur = con.execute(f"SELECT {_COLUMNS} FROM queries")
 
         data = cur.fetchall()
 
     if not data:
         return None
 
-    cache = [CacheRecord._make(row) for row in data]
+    cache = [_make_record(row) for row in data]
 
     return cache
 
 
+def cached_words(
+    con: sqlite3.Connection,
+    sort: WordOrder = "word",
+    method: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> Iterator[str]:
+    """Yield the searched words in the cache, read lazily from the cursor.
+
+    Only the `word` column is read, in an order served by an index. Expired
+    queries, and those of other search methods than `method`, are left out.
+    """
+    where = "created_timestamp >= ?"
+    parameters: list[Any] = [expiry()]
+
+    if method is not None:
+        where += " AND search_method = ?"
+        parameters.append(method)
+
+    cur = con.execute(
+        f"""SELECT word FROM queries WHERE {where}
+        ORDER BY {_WORD_ORDERS[sort]} LIMIT ? OFFSET ?""",
+        (*parameters, -1 if limit is None else limit, offset),
+    )
+
+    try:
+        for (word,) in cur:
+            yield word
+    finally:
+        cur.close()
+
+
+@retry_locked
 def clear_cache(con: sqlite3.Connection) -> None:
     """Delete all rows from the cache table, effectively clearing the cache."""
     with con:
@@ -88,66 +765,452 @@ def clear_cache(con: sqlite3.Connection) -> None:
 def insert_row(
     con: sqlite3.Connection,
     query: MerriamWebsterQuery,
-    response: str,
+    response: bytes,
 ) -> CacheRecord:
-    """Insert a query into the cache."""
-    word, timestamp, method, query_url = query
+    """Insert a query into the cache, evicting old queries if needed.
+
+    `response` is the raw response body, stored without being decoded.
+    """
+    (row,) = insert_rows(con, [(query, response)])
+
+    return row
+
+
+@retry_locked
+def insert_rows(
+    con: sqlite3.Connection,
+    responses: Sequence[tuple[MerriamWebsterQuery, bytes]],
+    stems: Optional[Mapping[str, Iterable[str]]] = None,
+) -> list[CacheRecord]:
+    """Insert many queries into the cache in one transaction, then evict once.
+
+    Each response is also indexed by the stems of its entries. `stems` holds them
+    by cache key for responses the caller decoded already, so they aren't decoded
+    twice. Other responses are decoded to find theirs.
+    """
+    rows = []
+    values = []
+    stem_rows = []
+
+    for query, response in responses:
+        word, timestamp, method, key = query
+        stored = compress(response)
+        size = len(stored)
+
+        rows.append(
+            CacheRecord(word, timestamp, method, key, response, timestamp, size)
+        )
+        values.append((word, timestamp, method, key, stored, timestamp, size, CODEC))
+
+        if stems is not None and key in stems:
+            stem_rows.extend(_stem_rows(query, stems[key]))
+        else:
+            stem_rows.extend(_stem_rows(query, entry_stems(word, response)))
 
     with con:
-        con.execute(
-            """INSERT INTO queries  
-        (word, created_timestamp, search_method, query_url, response_text) 
-        VALUES (?, ?, ?, ?, ?)""",
-            (
-                word,
-                timestamp,
-                method,
-                query_url,
-                response,
-            ),
+        # Another process may have cached the same word since we looked
+        con.executemany(
+            f"""INSERT INTO queries ({_COLUMNS})
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (cache_key) DO UPDATE SET {_UPDATE_COLUMNS}""",
+            values,
         )
+        con.executemany("INSERT OR REPLACE INTO stems VALUES (?, ?)", stem_rows)
 
-    row = CacheRecord(word, timestamp, method, query_url, response)
+        evict(con)
 
-    return row
+    return rows
+
+
+def export_cache(con: sqlite3.Connection, file: TextIO) -> int:
+    """Write each cached query to `file` as one line of JSON, and return the count.
+
+    Rows are read from the cursor one at a time, so the cache is never held in
+    memory. Cache keys are left out, to be derived again when imported.
+    """
+    exported = 0
 
+    cur = con.execute(
+        """SELECT word, search_method, created_timestamp, accessed_timestamp,
+        response, codec FROM queries ORDER BY created_timestamp"""
+    )
+    for word, method, created, accessed, stored, codec in cur:
+        record = {
+            "word": word,
+            "search_method": method,
+            "created_timestamp": created,
+            "accessed_timestamp": accessed,
+            "response": decompress(stored, codec).decode(),
+        }
+        file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        exported += 1
 
-def delete_row(con: sqlite3.Connection, url: httpx.URL) -> Optional[CacheRecord]:
+    return exported
+
+
+def import_cache(
+    con: sqlite3.Connection, lines: Iterable[str], batch_size: int = 500
+) -> int:
+    """Insert the queries written by `export_cache`, and return how many changed.
+
+    Lines are inserted in transactions of `batch_size`. A query already cached is
+    only replaced by a newer response. Old queries are evicted once at the end.
+    """
+    from dicc.query.common import MerriamWebsterQuery
+
+    imported = 0
+    batch: list[dict[str, Any]] = []
+
+    def flush() -> int:
+        if not batch:
+            return 0
+
+        values = []
+        stems = []
+
+        for record in batch:
+            created = datetime.datetime.fromisoformat(record["created_timestamp"])
+            accessed = datetime.datetime.fromisoformat(record["accessed_timestamp"])
+            method = record["search_method"]
+            query = MerriamWebsterQuery(
+                record["word"], created, method, cache_key(record["word"], method)
+            )
+            response = record["response"].encode()
+            stored = compress(response)
+
+            values.append((*query, stored, accessed, len(stored), CODEC))
+            stems.extend(_stem_rows(query, entry_stems(query.word, response)))
+
+        with con:
+            cur = con.executemany(
+                f"""INSERT INTO queries ({_COLUMNS})
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (cache_key) DO UPDATE SET
+                    word = excluded.word,
+                    created_timestamp = excluded.created_timestamp,
+                    response = excluded.response,
+                    accessed_timestamp = excluded.accessed_timestamp,
+                    size = excluded.size,
+                    codec = excluded.codec
+                WHERE excluded.created_timestamp > queries.created_timestamp""",
+                values,
+            )
+            con.executemany("INSERT OR REPLACE INTO stems VALUES (?, ?)", stems)
+
+        batch.clear()
+        return cur.rowcount
+
+    for line in lines:
+        if not line.strip():
+            continue
+
+        batch.append(json.loads(line))
+        if len(batch) >= batch_size:
+            imported += flush()
+
+    imported += flush()
+    evict(con)
+
+    return imported
+
+
+@retry_locked
+def delete_row(con: sqlite3.Connection, key: str) -> Optional[CacheRecord]:
     """Delete a query from the cache."""
     with con:
         cur = con.execute(
-            "SELECT * FROM queries WHERE query_url = ?",
-            (url,),
+            f"SELECT {_COLUMNS} FROM queries WHERE cache_key = ?",
+            (key,),
         )
 
-        data = cur.fetchall()
+        data = cur.fetchone()
 
         if not data:
             return None
 
         con.execute(
-            "DELETE FROM queries WHERE query_url = ?",
-            (url,),
+            "DELETE FROM queries WHERE cache_key = ?",
+            (key,),
         )
 
-    row = CacheRecord._make(data)
+    row = _make_record(data)
 
     return row
 
 
-def get_row(con: sqlite3.Connection, url: httpx.URL) -> Optional[CacheRecord]:
-    """Return a row from the cache, if it exists."""
+@retry_locked
+def touch_rows(con: sqlite3.Connection, hits: Mapping[str, int]) -> None:
+    """Mark rows as accessed now, counting the given hits for each key.
+
+    For hits answered without reading the row, as from memory.
+    """
+    accessed = datetime.datetime.now()
+
     with con:
-        cur = con.execute(
-            "SELECT * FROM queries WHERE query_url = ?",
-            (url,),
+        con.executemany(
+            """UPDATE queries SET accessed_timestamp = ?, hit_count = hit_count + ?
+            WHERE cache_key = ?""",
+            [(accessed, count, key) for key, count in hits.items()],
         )
 
-        data = cur.fetchone()
 
-        if not data:
-            return None
+def get_row(
+    con: sqlite3.Connection, key: str, stems: bool = True
+) -> Optional[CacheRecord]:
+    """Return a row from the cache, if it exists and has not expired.
 
-    row = CacheRecord._make(data)
+    If `stems`, a key missing from the cache is answered by a response indexed
+    under it as a stem.
+    """
+    return get_rows(con, [key], stems).get(key)
 
-    return row
+
+@retry_locked
+def get_rows(
+    con: sqlite3.Connection, keys: Sequence[str], stems: bool = True
+) -> dict[str, CacheRecord]:
+    """Return the rows for many keys in bulk, by key.
+
+    Missing and expired keys are left out. Returned rows are marked as accessed,
+    and counted as hits. If `stems`, keys missing from the cache are answered by
+    responses indexed under them as stems.
+    """
+    rows = _get_rows(con, keys)
+
+    if not stems or not (missing_keys := [key for key in keys if key not in rows]):
+        return rows
+
+    stem_keys = _get_stem_keys(con, missing_keys)
+    stem_rows = _get_rows(con, list(stem_keys.values()))
+
+    for stem_key, key in stem_keys.items():
+        if key in stem_rows:
+            rows[stem_key] = stem_rows[key]
+
+    return rows
+
+
+def _get_stem_keys(con: sqlite3.Connection, keys: Sequence[str]) -> dict[str, str]:
+    """Return the cache key indexed under each stem key, if any."""
+    stem_keys: dict[str, str] = {}
+    unique_keys = list(dict.fromkeys(keys))
+
+    with con:
+        for start in range(0, len(unique_keys), _MAX_PARAMETERS):
+            chunk = unique_keys[start : start + _MAX_PARAMETERS]
+            placeholders = ", ".join("?" * len(chunk))
+
+            cur = con.execute(
+                f"""SELECT stem_key, cache_key
+                FROM stems WHERE stem_key IN ({placeholders})""",
+                chunk,
+            )
+            stem_keys.update(cur)
+
+    return stem_keys
+
+
+def _get_rows(con: sqlite3.Connection, keys: Sequence[str]) -> dict[str, CacheRecord]:
+    """Return the rows for many keys in bulk, by key, without using stems."""
+    unique_keys = list(dict.fromkeys(keys))
+    rows: dict[str, CacheRecord] = {}
+    expired_keys = []
+
+    with con:
+        for start in range(0, len(unique_keys), _MAX_PARAMETERS):
+            chunk = unique_keys[start : start + _MAX_PARAMETERS]
+            placeholders = ", ".join("?" * len(chunk))
+
+            cur = con.execute(
+                f"""SELECT {_COLUMNS}, created_timestamp < ?
+                FROM queries WHERE cache_key IN ({placeholders})""",
+                (expiry(), *chunk),
+            )
+
+            for *values, expired in cur:
+                row = _make_record(tuple(values))
+
+                if expired:
+                    expired_keys.append((row.cache_key,))
+                else:
+                    rows[row.cache_key] = row
+
+        con.executemany("DELETE FROM queries WHERE cache_key = ?", expired_keys)
+
+        # Last access, for least recently used eviction
+        accessed = datetime.datetime.now()
+        con.executemany(
+            """UPDATE queries SET accessed_timestamp = ?, hit_count = hit_count + 1
+            WHERE cache_key = ?""",
+            [(accessed, key) for key in rows],
+        )
+
+    return {
+        key: row._replace(accessed_timestamp=accessed) for key, row in rows.items()
+    }
+
+
+def cached_keys(
+    con: sqlite3.Connection, keys: Sequence[str], stems: bool = True
+) -> set[str]:
+    """Return which keys have a cached response that has not expired.
+
+    Unlike `get_rows`, responses are not read, nor marked as accessed. If `stems`,
+    keys indexed as stems of a cached response are included.
+    """
+    unique_keys = list(dict.fromkeys(keys))
+    found: set[str] = set()
+    oldest = expiry()
+
+    with con:
+        for start in range(0, len(unique_keys), _MAX_PARAMETERS):
+            chunk = unique_keys[start : start + _MAX_PARAMETERS]
+            placeholders = ", ".join("?" * len(chunk))
+
+            cur = con.execute(
+                f"""SELECT cache_key FROM queries
+                WHERE cache_key IN ({placeholders}) AND created_timestamp >= ?""",
+                (*chunk, oldest),
+            )
+            found.update(key for (key,) in cur)
+
+            if not stems:
+                continue
+
+            cur = con.execute(
+                f"""SELECT stems.stem_key FROM stems
+                JOIN queries ON queries.cache_key = stems.cache_key
+                WHERE stems.stem_key IN ({placeholders})
+                AND queries.created_timestamp >= ?""",
+                (*chunk, oldest),
+            )
+            found.update(key for (key,) in cur)
+
+    return found
+
+
+def cached_versions(
+    con: sqlite3.Connection, keys: Sequence[str], stems: bool = True
+) -> dict[str, tuple[str, datetime.datetime]]:
+    """Return the key and creation time of the response cached for each key.
+
+    As `cached_keys` does, expired responses are left out, and responses are not
+    read. A response replaced by a newer one has a later creation time. If
+    `stems`, keys missing from the cache are answered by their stems, as by
+    `get_rows`.
+    """
+    unique_keys = list(dict.fromkeys(keys))
+    versions: dict[str, tuple[str, datetime.datetime]] = {}
+    oldest = expiry()
+
+    with con:
+        for start in range(0, len(unique_keys), _MAX_PARAMETERS):
+            chunk = unique_keys[start : start + _MAX_PARAMETERS]
+            placeholders = ", ".join("?" * len(chunk))
+
+            cur = con.execute(
+                f"""SELECT cache_key, cache_key, created_timestamp FROM queries
+                WHERE cache_key IN ({placeholders}) AND created_timestamp >= ?""",
+                (*chunk, oldest),
+            )
+            rows = cur.fetchall()
+
+            if stems:
+                cur = con.execute(
+                    f"""SELECT stems.stem_key, queries.cache_key,
+                    queries.created_timestamp FROM stems
+                    JOIN queries ON queries.cache_key = stems.cache_key
+                    WHERE stems.stem_key IN ({placeholders})
+                    AND queries.created_timestamp >= ?""",
+                    (*chunk, oldest),
+                )
+                rows.extend(cur)
+
+            for key, row_key, created in rows:
+                # A key's own row comes first, and is used over a stem
+                versions.setdefault(
+                    key, (row_key, datetime.datetime.fromisoformat(created))
+                )
+
+    return versions
+
+
+@retry_locked
+def record_api_usage(
+    con: sqlite3.Connection,
+    method: str,
+    requests: int = 1,
+    day: Optional[datetime.date] = None,
+) -> None:
+    """Count requests sent to the API for `method`, today unless `day` is given."""
+    if requests <= 0:
+        return
+
+    day = day or datetime.date.today()
+
+    with con:
+        con.execute(
+            """INSERT INTO api_usage VALUES (?, ?, ?)
+            ON CONFLICT (day, search_method)
+            DO UPDATE SET requests = requests + excluded.requests""",
+            (day.isoformat(), method, requests),
+        )
+
+
+def get_api_usage(
+    con: sqlite3.Connection, method: str, day: Optional[datetime.date] = None
+) -> int:
+    """Return the requests sent to the API for `method`, today unless `day`."""
+    day = day or datetime.date.today()
+
+    with con:
+        row = con.execute(
+            "SELECT requests FROM api_usage WHERE day = ? AND search_method = ?",
+            (day.isoformat(), method),
+        ).fetchone()
+
+    return row[0] if row else 0
+
+
+def get_rendered(
+    con: sqlite3.Connection, key: RenderKey, response_hash: str
+) -> Optional[str]:
+    """Return the output rendered for `key` from the given response, if cached."""
+    with con:
+        row = con.execute(
+            """SELECT output, codec FROM rendered
+            WHERE cache_key = ? AND word = ? AND width = ? AND color_system = ?
+            AND style_hash = ? AND response_hash = ?""",
+            (*key, response_hash),
+        ).fetchone()
+
+    if not row:
+        return None
+
+    output, codec = row
+
+    return decompress(output, codec).decode()
+
+
+@retry_locked
+def insert_rendered(
+    con: sqlite3.Connection, key: RenderKey, response_hash: str, output: str
+) -> None:
+    """Cache the output rendered for `key` from the given response."""
+    blob = compress(output.encode())
+
+    # An upsert, as the size triggers don't see rows deleted by REPLACE
+    with con:
+        con.execute(
+            """INSERT INTO rendered
+            (cache_key, word, width, color_system, style_hash,
+            response_hash, output, codec, size)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (cache_key, word, width, color_system, style_hash)
+            DO UPDATE SET
+            response_hash = excluded.response_hash,
+            output = excluded.output,
+            codec = excluded.codec,
+            size = excluded.size""",
+            (*key, response_hash, blob, CODEC, len(blob)),
+        )
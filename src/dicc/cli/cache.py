@@ -1,29 +1,101 @@
 """Interact with the cache through the CLI."""
 
-import sqlite3
+import sys
+from contextlib import nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING, Annotated, ContextManager, Literal, Optional, TextIO
 
 import typer
 
-from dicc import cache
-from dicc.cache import clear_cache, get_cache
+from dicc.cli.common import autocomplete_search_method, parse_method, read_word_file
 from dicc.terminal import console
 
+if TYPE_CHECKING:
+    from dicc.cache import WordOrder
+
+SORT_ORDERS = ("word", "age", "hits")
+
 app = typer.Typer()
 
 
+def autocomplete_sort(incomplete: str) -> list[str]:
+    """List of valid values for the --sort CLI option in `show`."""
+    return [name for name in SORT_ORDERS if name.startswith(incomplete)]
+
+
 @app.command()
-def show() -> None:
+def show(
+    limit: Annotated[
+        Optional[int],
+        typer.Option("--limit", "-n", help="Most words to show", min=0),
+    ] = None,
+    offset: Annotated[
+        int, typer.Option("--offset", help="Words to skip first", min=0)
+    ] = 0,
+    sort: Annotated[
+        str,
+        typer.Option(
+            "--sort",
+            help="Order by word, by age, newest first, or by hits, most first",
+            autocompletion=autocomplete_sort,
+        ),
+    ] = "word",
+    method: Annotated[
+        Optional[str],
+        typer.Option(
+            "--method",
+            "-m",
+            help="Only show words searched with this API method",
+            autocompletion=autocomplete_search_method,
+            show_default=False,
+        ),
+    ] = None,
+) -> None:
     """Display searched words in the cache."""
-    db = cache.create_cache_path(cache.CACHE_PATH)
-    con = sqlite3.connect(db)
+    from dicc import cache
+
+    if sort not in SORT_ORDERS:
+        raise typer.BadParameter(f"Unknown order: {sort}", param_hint="--sort")
+    order: WordOrder = sort  # type: ignore [assignment]
+
+    query_method = parse_method(method) if method else None
+
+    con = cache.connect()
+
+    try:
+        for word in cache.cached_words(con, order, query_method, limit, offset):
+            console.print(word)
+    finally:
+        con.close()
+
+
+@app.command()
+def stats() -> None:
+    """Display the size of the cache."""
+    from dicc import cache
+    from dicc.cache import get_stats
+    from dicc.daemon import client as daemon_client
+    from dicc.hot_cache import HotCacheStats
 
-    if not (cached_items := get_cache(con)):
-        # Show nothing
-        return
+    con = cache.connect()
 
-    # Print items
-    for item in cached_items:
-        console.print(item.word)
+    entries, total_size, max_size, hits, schema_version = get_stats(con)
+
+    console.print(f"Entries: {entries}")
+    console.print(f"Size: {total_size / 1024 / 1024:.2f} / {max_size / 1024 / 1024} MB")
+    console.print(f"Hits: {hits}")
+    console.print(f"Schema version: {schema_version}")
+
+    # Only a running daemon keeps responses in memory for long
+    if (response := daemon_client.request({"command": "stats"})) and (
+        "hot_cache" in response
+    ):
+        hot = HotCacheStats(**response["hot_cache"])
+        console.print(
+            f"Daemon memory: {hot.entries} entries, "
+            f"{hot.size / 1024 / 1024:.2f} / {hot.max_size / 1024 / 1024} MB, "
+            f"{hot.hit_ratio:.1%} hit ratio ({hot.hits} hits, {hot.misses} misses)"
+        )
 
     con.close()
 
@@ -31,13 +103,174 @@ def show() -> None:
 @app.command()
 def clear() -> None:
     """Clear all searched words from the cache."""
-    db = cache.create_cache_path(cache.CACHE_PATH)
-    con = sqlite3.connect(db)
+    from dicc import cache
+    from dicc.cache import clear_cache
+
+    con = cache.connect()
 
     clear_cache(con)
 
     con.close()
 
 
+@app.command()
+def warm(
+    wordlist: Annotated[
+        Path,
+        typer.Argument(
+            help="File of words, one per line",
+            show_default=False,
+            exists=True,
+            dir_okay=False,
+        ),
+    ],
+    method: Annotated[
+        str,
+        typer.Option(
+            "--method",
+            "-m",
+            help="Search with alternative API method",
+            autocompletion=autocomplete_search_method,
+        ),
+    ] = "collegiate",
+    concurrency: Annotated[
+        int,
+        typer.Option("--concurrency", "-c", help="Most requests at once", min=1),
+    ] = 4,
+    rate: Annotated[
+        Optional[float],
+        typer.Option(
+            "--rate",
+            help="Most requests started each second, or 0 for no limit",
+            min=0,
+            show_default="from config",
+        ),
+    ] = None,
+    quota: Annotated[
+        Optional[int],
+        typer.Option(
+            "--quota",
+            help="Most requests sent each day, including searches",
+            min=0,
+            show_default="from config",
+        ),
+    ] = None,
+    exact: Annotated[
+        bool,
+        typer.Option(
+            "--exact",
+            "-e",
+            help="Fetch words only cached as stems of other words",
+        ),
+    ] = False,
+) -> None:
+    """Fetch the words in WORDLIST that are not cached yet.
+
+    Run again to finish after an interruption, or once the daily quota resets.
+    """
+    from rich.progress import Progress
+
+    from dicc import cache
+    from dicc.query import warm as warm_
+
+    query_method = parse_method(method)
+    words = read_word_file(wordlist)
+
+    con = cache.connect()
+
+    if quota is None:
+        quota = warm_.daily_quota()
+    if rate is None:
+        rate = warm_.requests_per_second()
+
+    plan = warm_.plan_warm(con, words, query_method, quota, exact)
+    console.print(f"Cached: {plan.cached}, to fetch: {len(plan.queries)}")
+
+    results = warm_.warm(con, plan.queries, concurrency, rate)
+    failed = 0
+
+    try:
+        with Progress(console=console, transient=True) as progress:
+            task = progress.add_task("Warming", total=len(plan.queries))
+
+            for warmed in results:
+                if warmed.error:
+                    failed += 1
+                    console.print(f"{warmed.query.word}: {warmed.error}", style="red")
+                progress.advance(task)
+    finally:
+        results.close()  # Cache what was fetched, if interrupted
+        con.close()
+
+    console.print(f"Fetched: {len(plan.queries) - failed}, failed: {failed}")
+    if plan.deferred:
+        console.print(f"Over today's quota: {plan.deferred}, run again tomorrow")
+
+
+def _open_archive(path: Path, mode: Literal["r", "w"]) -> ContextManager[TextIO]:
+    """Open a JSON lines archive, compressed if named `.gz`, or stdin/stdout for -."""
+    if str(path) == "-":
+        return nullcontext(sys.stdin if mode == "r" else sys.stdout)
+
+    if path.suffix == ".gz":
+        import gzip
+
+        return gzip.open(path, "rt" if mode == "r" else "wt", encoding="utf-8")
+
+    return open(path, mode, encoding="utf-8")
+
+
+@app.command()
+def export(
+    path: Annotated[
+        Path,
+        typer.Argument(
+            help="JSON lines file to write, compressed if named .gz, or - for stdout",
+            show_default=False,
+        ),
+    ],
+) -> None:
+    """Write the cached responses to PATH, to import into another cache."""
+    from dicc import cache
+
+    con = cache.connect()
+
+    try:
+        with _open_archive(path, "w") as file:
+            exported = cache.export_cache(con, file)
+    finally:
+        con.close()
+
+    if str(path) != "-":
+        console.print(f"Exported: {exported}")
+
+
+@app.command("import")
+def import_(
+    path: Annotated[
+        Path,
+        typer.Argument(
+            help="JSON lines file to read, compressed if named .gz, or - for stdin",
+            show_default=False,
+        ),
+    ],
+) -> None:
+    """Add the responses exported to PATH to the cache.
+
+    Responses already cached are only replaced by newer ones.
+    """
+    from dicc import cache
+
+    con = cache.connect()
+
+    try:
+        with _open_archive(path, "r") as file:
+            imported = cache.import_cache(con, file)
+    finally:
+        con.close()
+
+    console.print(f"Imported: {imported}")
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,41 @@
+"""Options shared by commands of the CLI."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import typer
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from dicc.url import QueryMethod
+
+
+def autocomplete_search_method(incomplete: str) -> list[str]:
+    """List of valid flags for the --method CLI option."""
+    valid_names = ("collegiate", "c", "thesaurus", "t")
+    completion = []
+    for name in valid_names:
+        if name.startswith(incomplete):
+            completion.append(name)
+
+    return completion
+
+
+def parse_method(method: str) -> QueryMethod:
+    """Return the query method named by the --method CLI option."""
+    match method:
+        case "collegiate" | "c":
+            return "dictionary"
+
+        case "thesaurus" | "t":
+            return "thesaurus"
+
+        case _:
+            raise typer.BadParameter(f"Unknown method: {method}", param_hint="--method")
+
+
+def read_word_file(path: Path) -> list[str]:
+    """Read one word per line, skipping blank lines."""
+    with open(path, encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip()]
@@ -1,28 +1,37 @@
-"""Main entrypoint to the CLI."""
+"""Main entrypoint to the CLI.
 
-from typing import Annotated, Optional
+Commands import what they use when they run, so a search answered by the daemon
+does not load the cache, the HTTP client or the display modules, and `--help` or
+shell completion does not load the configuration.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Annotated, Optional
 
 import typer
-from rich.console import Group
-from rich.panel import Panel
-from rich.text import Text
+from rich.console import Console
 
 from dicc.cli import cache
-from dicc.query.main import search_word
+from dicc.cli.common import autocomplete_search_method, parse_method, read_word_file
+from dicc.daemon import client as daemon_client
 from dicc.terminal import console
 
-app = typer.Typer(pretty_exceptions_show_locals=False)
+if TYPE_CHECKING:
+    from dicc.display.plain import OutputFormat
+    from dicc.url import QueryMethod
 
+OUTPUT_FORMATS = ("rich", "plain", "json", "markdown")
+
+app = typer.Typer(pretty_exceptions_show_locals=False)
 
-def autocomplete_search_method(incomplete: str) -> list[str]:
-    """List of valid flags for the --method CLI option in `search`."""
-    valid_names = ("collegiate", "c", "thesaurus", "t")
-    completion = []
-    for name in valid_names:
-        if name.startswith(incomplete):
-            completion.append(name)
 
-    return completion
+def autocomplete_output_format(incomplete: str) -> list[str]:
+    """List of valid values for the --format CLI option in `search`."""
+    return [name for name in OUTPUT_FORMATS if name.startswith(incomplete)]
 
 
 @app.callback()
@@ -36,7 +45,7 @@ def set_width(width: Optional[int] = None) -> None:
 
 @app.command()
 def search(
-    word: str,
+    words: Annotated[Optional[list[str]], typer.Argument(show_default=False)] = None,
     method: Annotated[
         str,
         typer.Option(
@@ -46,26 +55,195 @@ def search(
             autocompletion=autocomplete_search_method,
         ),
     ] = "collegiate",
+    file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--file",
+            "-f",
+            help="Also search for each word in FILE, one per line",
+            exists=True,
+            dir_okay=False,
+        ),
+    ] = None,
+    concurrency: Annotated[
+        int,
+        typer.Option(
+            "--concurrency",
+            "-c",
+            help="Most API requests in flight at once",
+            min=1,
+        ),
+    ] = 8,
+    exact: Annotated[
+        bool,
+        typer.Option(
+            "--exact",
+            "-e",
+            help="Query the API for words only cached as stems of other words",
+        ),
+    ] = False,
+    output_format: Annotated[
+        str,
+        typer.Option(
+            "--format",
+            "-F",
+            help="Output format. plain, json (one line per word) and markdown skip "
+            "terminal layout",
+            autocompletion=autocomplete_output_format,
+        ),
+    ] = "rich",
+    use_daemon: Annotated[
+        bool,
+        typer.Option(
+            "--daemon/--no-daemon",
+            help="Search through the daemon, if one is running",
+        ),
+    ] = True,
+    show_profile: Annotated[
+        bool,
+        typer.Option(
+            "--profile",
+            help="Print the time spent in each stage to stderr. Implies --no-daemon",
+        ),
+    ] = False,
+    profile_json: Annotated[
+        bool,
+        typer.Option(
+            "--profile-json",
+            help="As --profile, but print the timings as one line of JSON",
+        ),
+    ] = False,
 ) -> None:
-    """Search for WORD in the Collegiate API.
+    """Search for WORDS in the Collegiate API.
 
-    If --method, search for WORD in the given API.
+    If --method, search for WORDS in the given API. Results are shown in the
+    order searched.
     """
-    match method:
-        case "collegiate" | "c":
-            result = search_word(word, "dictionary")
-
-        case "thesaurus" | "t":
-            result = search_word(word, "thesaurus")
-
-    dict_item_renderables = Group(*result)
-    console.print(
-        Panel(
-            dict_item_renderables,
-            title=Text(word.upper(), style="bold white"),
-            title_align="center",
+    all_words = [*(words or []), *(read_word_file(file) if file else [])]
+    if not all_words:
+        raise typer.BadParameter("No words to search for.", param_hint="WORDS")
+
+    query_method = parse_method(method)
+
+    if output_format not in OUTPUT_FORMATS:
+        raise typer.BadParameter(
+            f"Unknown format: {output_format}", param_hint="--format"
+        )
+    format_: OutputFormat = output_format  # type: ignore [assignment]
+
+    if not (show_profile or profile_json):
+        _search(all_words, query_method, concurrency, exact, format_, use_daemon)
+        return
+
+    from dicc import profile
+
+    # Stages run in the daemon would not be timed
+    with profile.profiling() as timings:
+        _search(all_words, query_method, concurrency, exact, format_, use_daemon=False)
+
+    if profile_json:
+        sys.stderr.write(json.dumps(timings.to_dict()) + "\n")
+    else:
+        Console(stderr=True).print(timings.table())
+
+
+def _search(
+    words: list[str],
+    method: QueryMethod,
+    concurrency: int,
+    exact: bool,
+    output_format: OutputFormat,
+    use_daemon: bool,
+) -> None:
+    """Search for words through the daemon, or in-process, and print the results."""
+    if use_daemon:
+        output = daemon_client.search(
+            words, method, concurrency, console.width, exact, output_format
+        )
+        if output is not None:
+            console.file.write(output)
+            return
+
+    # No daemon, search in-process
+    from dicc import profile
+
+    with profile.stage("import"):
+        from dicc.query.main import search_rendered
+
+    outputs = search_rendered(words, method, concurrency, exact, output_format)
+    for output in outputs:
+        console.file.write(output)
+
+
+@app.command()
+def stream(
+    method: Annotated[
+        str,
+        typer.Option(
+            "--method",
+            "-m",
+            help="Search with alternative API method",
+            autocompletion=autocomplete_search_method,
+        ),
+    ] = "collegiate",
+    concurrency: Annotated[
+        int,
+        typer.Option(
+            "--concurrency",
+            "-c",
+            help="Most words looked up at once",
+            min=1,
+        ),
+    ] = 8,
+    ordered: Annotated[
+        bool,
+        typer.Option(
+            "--ordered/--unordered",
+            help="Write results in input order, or as each is ready",
         ),
-    )
+    ] = True,
+    exact: Annotated[
+        bool,
+        typer.Option(
+            "--exact",
+            "-e",
+            help="Query the API for words only cached as stems of other words",
+        ),
+    ] = False,
+) -> None:
+    """Look up each word read from stdin, and write one line of JSON for each.
+
+    Lines have the format of `search --format json`, or a "word" and an "error".
+    """
+    query_method = parse_method(method)
+
+    from dicc.query.stream import stream_search
+
+    lines = stream_search(sys.stdin, query_method, concurrency, ordered, exact)
+
+    try:
+        for line in lines:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+    except BrokenPipeError:  # The reader went away, as with `| head`
+        # Don't fail again flushing stdout on exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+
+@app.command()
+def daemon() -> None:
+    """Run the dicc daemon, until interrupted.
+
+    While the daemon runs, searches are answered by it, keeping the cache, the
+    HTTP connections and recent responses warm between searches.
+    """
+    if daemon_client.request({"command": "ping"}):
+        console.print("A dicc daemon is already running.", style="red")
+        raise typer.Exit(code=1)
+
+    from dicc.daemon.server import serve
+
+    serve()
 
 
 app.add_typer(cache.app, name="cache")
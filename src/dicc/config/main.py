@@ -2,11 +2,16 @@
 from __future__ import annotations
 
 import os
+import pickle
+import tempfile
 from pathlib import Path
 from typing import TYPE_CHECKING, TypedDict
 
-import tomllib
-from attrs import define
+from attrs import define, field
+from rich.errors import StyleSyntaxError
+from rich.style import Style
+
+from dicc.profile import stage
 
 if TYPE_CHECKING:
     from typing import NotRequired, Optional, Self
@@ -25,12 +30,32 @@ if xdg_config_home := os.environ.get("XDG_CONFIG_HOME"):
         0, Path(xdg_config_home) / Path("dicc/") / USER_CONFIG_FILENAME
     )  # xdg_config_home
 
+# Merged configuration, with parsed styles. Bump the version when its shape changes.
+SNAPSHOT_PATH = Path.home() / ".cache" / "dicc" / "config.pickle"
+SNAPSHOT_VERSION = 1
+
 
 class CacheSchema(TypedDict):
     """The cache table schema."""
 
     max_size: int
     max_age: int
+    rendered: NotRequired[bool]
+    memory_size: NotRequired[int]
+
+
+class HttpSchema(TypedDict):
+    """The http table schema."""
+
+    # A user table may set only some keys, and replaces the default table
+    http2: NotRequired[bool]
+    timeout: NotRequired[float]
+    connect_timeout: NotRequired[float]
+    max_connections: NotRequired[int]
+    max_keepalive_connections: NotRequired[int]
+    keepalive_expiry: NotRequired[float]
+    requests_per_second: NotRequired[float]
+    daily_quota: NotRequired[int]
 
 
 class LogSchema(TypedDict):
@@ -97,20 +122,49 @@ class ConfigSchema(TypedDict):
     """The toml configuration file schema."""
 
     cache: NotRequired[CacheSchema]
+    http: NotRequired[HttpSchema]
     log: NotRequired[LogSchema]
     style: NotRequired[StyleSchema]
 
 
+def _parse_styles(style: StyleSchema) -> dict[str, Style]:
+    """Parse each style definition of the style table, by definition."""
+    styles: dict[str, Style] = {}
+
+    for table in (style.get("display", {}), style.get("tags", {})):
+        for definition in table.values():
+            if not isinstance(definition, str):
+                continue
+
+            try:
+                styles[definition] = Style.parse(definition)
+            except StyleSyntaxError:  # Raised when used, as before
+                continue
+
+    return styles
+
+
 @define
 class Configuration:
     """The `dicc` configuration."""
 
     cache: CacheSchema
+    http: HttpSchema
     log: LogSchema
     style: StyleSchema
+    styles: dict[str, Style] = field(factory=dict)  # Parsed, by definition
+
+    def parsed_style(self, definition: str) -> Style:
+        """Return a style definition parsed, when loaded if it is configured."""
+        if (style := self.styles.get(definition)) is None:
+            style = Style.parse(definition)
+
+        return style
 
     @staticmethod
     def _load_file(path: Path) -> ConfigSchema:
+        import tomllib  # Only when the snapshot is out of date
+
         with open(path, "rb") as file:
             # I promise this is OK, mypy
             config: ConfigSchema = tomllib.load(file)  # type: ignore [assignment]
@@ -126,11 +180,19 @@ class Configuration:
 
     @classmethod
     def load(cls) -> Self:
-        """Load the user configuration."""
+        """Load the user configuration, and parse its styles."""
+        config = cls._read()
+        config.styles = _parse_styles(config.style)
+
+        return config
+
+    @classmethod
+    def _read(cls) -> Self:
         default_values = Configuration._load_file(DEFAULT_CONFIG_LOCATION)
 
         default_config = cls(
             cache=default_values["cache"],  # Can use direct lookup here
+            http=default_values["http"],
             log=default_values["log"],
             style=default_values["style"],
         )
@@ -146,6 +208,8 @@ class Configuration:
 
         if user_cache := user_values.get("cache"):
             user_config.cache = user_cache
+        if user_http := user_values.get("http"):
+            user_config.http = user_http
         if user_log := user_values.get("log"):
             user_config.log = user_log
         if user_style := user_values.get("style"):
@@ -154,4 +218,72 @@ class Configuration:
         return user_config
 
 
-CONFIG = Configuration.load()
+def _source_stamps() -> list[tuple[str, Optional[tuple[int, int]]]]:
+    """Return the modification time and size of each file config may be read from.
+
+    Missing files are included, so creating a user file also changes the stamps.
+    """
+    stamps: list[tuple[str, Optional[tuple[int, int]]]] = []
+
+    for path in [DEFAULT_CONFIG_LOCATION, *USER_CONFIG_LOCATIONS]:
+        try:
+            stat = path.stat()
+        except OSError:
+            stamps.append((str(path), None))
+        else:
+            stamps.append((str(path), (stat.st_mtime_ns, stat.st_size)))
+
+    return stamps
+
+
+def load_snapshot(path: Path = SNAPSHOT_PATH) -> Configuration:
+    """Load the configuration from a snapshot, or from its files if they changed.
+
+    The snapshot holds the merged configuration and its parsed styles. It is
+    written again whenever it is missing, unreadable or out of date.
+    """
+    stamps = _source_stamps()
+
+    try:
+        with open(path, "rb") as file:
+            version, snapshot_stamps, config = pickle.load(file)
+    except Exception:  # Missing, or unreadable by this version
+        pass
+    else:
+        if version == SNAPSHOT_VERSION and snapshot_stamps == stamps:
+            if isinstance(config, Configuration):
+                return config
+
+    config = Configuration.load()
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as snapshot:
+            pickle.dump((SNAPSHOT_VERSION, stamps, config), snapshot)
+        os.replace(snapshot.name, path)  # Readers never see a partial snapshot
+    except OSError:  # Read only, or full. Load from the files next time.
+        pass
+
+    return config
+
+
+_config: Optional[Configuration] = None
+
+
+def get_config() -> Configuration:
+    """Return the user configuration, loading it on first use."""
+    global _config
+
+    if _config is None:
+        with stage("config"):
+            _config = load_snapshot(SNAPSHOT_PATH)
+
+    return _config
+
+
+def __getattr__(name: str) -> Configuration:
+    # `CONFIG` is loaded on first access, rather than when this module is imported
+    if name == "CONFIG":
+        return get_config()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
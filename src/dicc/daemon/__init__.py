@@ -0,0 +1,10 @@
+"""Long-lived `dicc` daemon, and the thin client used to reach it.
+
+The daemon keeps the configuration, the cache connection, a warm HTTP connection
+pool and recently used responses resident. `dicc search` sends its words over a
+Unix socket and only prints the rendered result.
+"""
+import pathlib
+
+# Kept here, rather than imported from `dicc.cache`, so the client stays light
+SOCKET_PATH = pathlib.Path().home() / ".cache" / "dicc" / "daemon.sock"
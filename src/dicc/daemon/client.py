@@ -0,0 +1,80 @@
+"""Reach a running `dicc` daemon.
+
+Only the standard library is imported, so a search answered by the daemon does
+not pay for loading the configuration, the cache or the HTTP client.
+"""
+from __future__ import annotations
+
+import json
+import socket
+from typing import TYPE_CHECKING, Any
+
+from dicc.daemon import SOCKET_PATH
+
+if TYPE_CHECKING:
+    import pathlib
+    from typing import Optional
+
+CONNECT_TIMEOUT = 0.5  # Seconds
+RESPONSE_TIMEOUT = 60.0  # Seconds, long enough for many network misses
+
+
+def request(
+    message: dict[str, Any], socket_path: pathlib.Path = SOCKET_PATH
+) -> Optional[dict[str, Any]]:
+    """Send one request to the daemon, or return `None` if none is running."""
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(str(socket_path))
+    except OSError:  # No socket, or a stale one
+        sock.close()
+        return None
+
+    with sock:
+        sock.settimeout(RESPONSE_TIMEOUT)
+        sock.sendall(json.dumps(message).encode() + b"\n")
+
+        with sock.makefile("rb") as file:
+            line = file.readline()
+
+    if not line:
+        return None
+
+    response: dict[str, Any] = json.loads(line)
+
+    return response
+
+
+def search(
+    words: list[str],
+    method: str,
+    concurrency: int,
+    width: int,
+    exact: bool = False,
+    output_format: str = "rich",
+    socket_path: pathlib.Path = SOCKET_PATH,
+) -> Optional[str]:
+    """Return the rendered search results from the daemon, if one is running.
+
+    Returns `None` if no daemon is running, or if it failed to search, so the
+    caller can search in-process instead.
+    """
+    message = {
+        "command": "search",
+        "words": words,
+        "method": method,
+        "concurrency": concurrency,
+        "width": width,
+        "exact": exact,
+        "format": output_format,
+    }
+
+    response = request(message, socket_path)
+
+    if not response or "output" not in response:
+        return None
+
+    output: str = response["output"]
+
+    return output
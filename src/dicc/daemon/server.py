@@ -0,0 +1,160 @@
+"""The `dicc` daemon.
+
+Requests are served one at a time, so the sqlite connection and the console are
+never shared between threads. Restart the daemon to pick up configuration
+changes.
+"""
+from __future__ import annotations
+
+import json
+import signal
+import socketserver
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+import httpx
+from attrs import define, field
+
+from dicc import cache
+from dicc.daemon import SOCKET_PATH
+from dicc.hot_cache import HotCache
+from dicc.query.client import close_client, get_client
+from dicc.query.common import create_query, resolve_responses, try_fetch_response
+from dicc.query.render import render_responses
+from dicc.terminal import console
+
+if TYPE_CHECKING:
+    import pathlib
+
+    from dicc.display.plain import OutputFormat
+    from dicc.query.common import Fetched, MerriamWebsterQuery
+    from dicc.url import QueryMethod
+
+
+@define
+class Daemon:
+    """State kept resident between requests."""
+
+    con: sqlite3.Connection
+    client: httpx.Client
+    hot_cache: HotCache = field(factory=HotCache)
+
+    @classmethod
+    def open(cls, db: pathlib.Path) -> Daemon:
+        """Open the cache and the HTTP connection pool."""
+        # Requests are served one at a time, from whichever thread serves them
+        con = cache.connect(db, check_same_thread=False)
+
+        return cls(con=con, client=get_client())
+
+    def close(self) -> None:
+        """Close the cache and the HTTP connection pool."""
+        close_client()
+        self.con.close()
+
+    def _fetch(
+        self, queries: list[MerriamWebsterQuery], concurrency: int
+    ) -> list[Fetched]:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(
+                executor.map(
+                    lambda query: try_fetch_response(query, self.client), queries
+                )
+            )
+
+    def search(
+        self,
+        words: list[str],
+        method: QueryMethod,
+        concurrency: int,
+        width: int,
+        exact: bool = False,
+        output_format: OutputFormat = "rich",
+    ) -> str:
+        """Search for words, and return the results rendered for the terminal."""
+        queries = [create_query(word, method) for word in words]
+        responses = resolve_responses(
+            queries,
+            self.con,
+            lambda misses: self._fetch(misses, concurrency),
+            exact,
+            self.hot_cache,
+        )
+        self.hot_cache.flush(self.con)
+
+        console.width = width
+
+        return "".join(
+            render_responses(self.con, queries, responses, output_format)
+        )
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Answer one request from a client."""
+        match request.get("command"):
+            case "search":
+                output = self.search(
+                    request["words"],
+                    request["method"],
+                    request["concurrency"],
+                    request["width"],
+                    request.get("exact", False),
+                    request.get("format", "rich"),
+                )
+                return {"output": output}
+
+            case "ping":
+                return {"status": "ok"}
+
+            case "stats":
+                return {"hot_cache": self.hot_cache.stats()._asdict()}
+
+            case command:
+                return {"error": f"Unknown command: {command}"}
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """Unix socket server holding the daemon state."""
+
+    def __init__(self, socket_path: pathlib.Path, daemon: Daemon) -> None:
+        self.daemon = daemon
+        super().__init__(str(socket_path), DaemonRequestHandler)
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """Read one JSON request line, and write one JSON response line."""
+
+    server: DaemonServer
+
+    def handle(self) -> None:
+        """Answer the request."""
+        if not (line := self.rfile.readline()):
+            return
+
+        try:
+            response = self.server.daemon.handle(json.loads(line))
+        except Exception as error:  # Reported to the client, which falls back
+            response = {"error": f"{type(error).__name__}: {error}"}
+
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+def serve(socket_path: pathlib.Path = SOCKET_PATH) -> None:
+    """Run the daemon until interrupted."""
+    db = cache.create_cache_path(cache.CACHE_PATH)
+    socket_path.unlink(missing_ok=True)  # Left behind by a daemon that was killed
+
+    daemon = Daemon.open(db)
+
+    # Clean up on `kill`, as on Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    try:
+        with DaemonServer(socket_path, daemon) as server:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
+        socket_path.unlink(missing_ok=True)
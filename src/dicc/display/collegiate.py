@@ -1,6 +1,7 @@
 """The `Collegiate` API object, and associated functions to display it."""
 from __future__ import annotations
 
+from functools import cached_property
 from typing import TYPE_CHECKING, Optional
 
 from attrs import define
@@ -10,7 +11,7 @@ from rich.table import Table
 from rich.text import Text
 from rich.tree import Tree
 
-from dicc.config.main import CONFIG
+from dicc.config.main import get_config
 from dicc.display.common import format_text
 from dicc.display.format_element import format_dt, format_quotations
 from dicc.responses.abstract import MerriamWebsterItem
@@ -104,7 +105,7 @@ class DefinitionRow:
             return Text("   ")
         return Text(f"{self.seq_sense} ", style="italic blue")
 
-    @property
+    @cached_property
     def formatted_text(self) -> Text:
         return format_text(self.unformatted_text)
 
@@ -272,13 +273,16 @@ class Collegiate(MerriamWebsterItem):
 
     def format_panel_title(self) -> Text:
         """Format the dictionary item title."""
+        config = get_config()
+        display = config.style["display"]
+
         dict_index_text = Text(
-            f" {self.index + 1} ", style=CONFIG.style["display"]["item_index"]
+            f" {self.index + 1} ", style=config.parsed_style(display["item_index"])
         )
-        panel_title_spacing = Text(" ─── ", style=CONFIG.style["display"]["panel"])
+        panel_title_spacing = Text(" ─── ", style=config.parsed_style(display["panel"]))
         headword_text = Text(
             self.meta["id"].replace(":", " : "),
-            style=CONFIG.style["display"]["headword"],
+            style=config.parsed_style(display["headword"]),
         )
 
         # BUG: Waiting on https://github.com/Textualize/rich/issues/2745 to merge
@@ -294,20 +298,24 @@ class Collegiate(MerriamWebsterItem):
         )
 
         if functional_label := self.fl:
-            fl_text = Text(functional_label, style=CONFIG.style["display"]["fl"])
+            fl_text = Text(functional_label, style=config.parsed_style(display["fl"]))
             panel_title.append_text(panel_title_spacing).append_text(fl_text)
 
         return panel_title
 
     def format_pronunciations(self) -> Optional[Text]:
         """Format the dictionary item pronunciations."""
+        config = get_config()
+        display = config.style["display"]
+
         if not (pronunciations := self.hwi.get("prs")):
             return None
 
+        pronunciation_style = config.parsed_style(display["pronunciation_content"])
         pronunciation_separator = Text(" | ")  # Separate pronunciations
         pronunciation_text = pronunciation_separator.join(
             [
-                Text(pron["mw"], style=CONFIG.style["display"]["pronunciation_content"])
+                Text(pron["mw"], style=pronunciation_style)
                 for pron in pronunciations
             ]
         )
@@ -325,13 +333,17 @@ class Collegiate(MerriamWebsterItem):
 
     def format_short_defs(self) -> Optional[Text]:
         """Format the dictionary item short definitions."""
+        config = get_config()
+        display = config.style["display"]
+
         if not (shortdefs := self.shortdef):
             return None
 
+        shortdef_style = config.parsed_style(display["short_def_content"])
         shortdef_separator = Text("\n")
         shortdef_text = shortdef_separator.join(
             [
-                Text(f"• {defs}", style=CONFIG.style["display"]["short_def_content"])
+                Text(f"• {defs}", style=shortdef_style)
                 for defs in shortdefs
             ]
         )
@@ -341,7 +353,7 @@ class Collegiate(MerriamWebsterItem):
             .append_text(
                 Text(
                     "Short Definition:",
-                    style=CONFIG.style["display"]["short_def_title"],
+                    style=config.parsed_style(display["short_def_title"]),
                 )
             )
             .append_text(Text("\n"))
@@ -352,20 +364,25 @@ class Collegiate(MerriamWebsterItem):
 
     def format_stems(self) -> Optional[Text]:
         """Format the dictionary item headword stems."""
+        config = get_config()
+        display = config.style["display"]
+
         if not (stems := self.meta.get("stems")):
             return None
 
         stem_separator = Text(" | ")
         stem_text = stem_separator.join(
             [
-                Text(stem, style=CONFIG.style["display"]["stem_content"])
+                Text(stem, style=config.parsed_style(display["stem_content"]))
                 for stem in stems
             ]
         )
 
         stem_line = (
             Text("")
-            .append_text(Text("Stems:", style=CONFIG.style["display"]["stem_title"]))
+            .append_text(
+                Text("Stems:", style=config.parsed_style(display["stem_title"]))
+            )
             .append_text(Text(" "))
             .append_text(stem_text)
         )
@@ -465,6 +482,9 @@ class Collegiate(MerriamWebsterItem):
 
         renderable_group = Group(*renderables)
 
-        yield Rule(panel_title, align="left", style=CONFIG.style["display"]["panel"])
+        config = get_config()
+        panel_style = config.parsed_style(config.style["display"]["panel"])
+
+        yield Rule(panel_title, align="left", style=panel_style)
         yield renderable_group
         yield str()  # Empty line between items
@@ -1,332 +1,311 @@
 """Common functions for parsing and displaying data."""
 
-import re
-
-from rich.style import Style
-from rich.text import Text
-
-from dicc.config.main import CONFIG
-
-# TODO: Standardize these functions so they behave in the same way
-
-
-def _remove_tag(text: Text, tag: str) -> Text:
-    """Remove all occurences of one tag."""
-    final_text = Text()
-
-    split = text.split(separator=tag)
-    [final_text.append_text(line) for line in split]
-
-    return final_text
+from __future__ import annotations
 
+import bisect
+import functools
+from typing import TYPE_CHECKING, NamedTuple, Optional
 
-def _remove_tag_pair(text: Text, open_tag: str, close_tag: str) -> Text:
-    """Remove all occurences of two tags, as an open and closing tag."""
-    # NOTE: There is probably a clever way to do this with recursion.
-
-    initial_text = Text()
-    final_text = Text()
-
-    initial_text.append_text(_remove_tag(text, open_tag))
-    final_text.append_text(_remove_tag(initial_text, close_tag))
-
-    return final_text
-
-
-def _stylize_at_tag(
-    text: Text,
-    pattern: str,
-    replacement: Text,
-) -> Text:
-    """Replace a single tag, as regex pattern, with `Text`."""
-    simple_text = text.plain
-
-    search = re.compile(pattern)
-    first_hit = search.search(simple_text)
+from attrs import define
+from rich.style import Style
+from rich.text import Span, Text
+
+from dicc.config.main import get_config
+from dicc.display.markup import tokenize
+from dicc.profile import timed
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+    from dicc.config.main import StyleTagsSchema
+    from dicc.display.markup import Token, TokenKind
+
+# Tag pairs, styled between the open and close tag
+TAG_PAIRS = {
+    "b": "bold",
+    "it": "italic",
+    "sc": "small_caps",
+    "inf": "subscript",
+    "sup": "superscript",
+    "parahw": "paragraph_word",
+    "phrase": "phrase",
+    "qword": "quote_word",
+    "wi": "run_in_word",
+}
+
+# Solo tags, entirely substituted
+TAG_SOLO = {
+    "bc": (": ", "bold_colon"),
+    "ldquo": ('"', "l_double_quote"),
+    "rdquo": ('"', "r_double_quote"),
+}
+
+# Tag pairs, where the tags themselves are substituted
+TAG_BRACKETS: dict[str, tuple[str, str, Optional[str]]] = {
+    "gloss": ("[", "]", "glossary"),
+    "dx_def": ("(", ")", None),
+}
+
+# Directional cross reference tag pairs, the close tag is removed
+TAG_DIRECTIONAL = {
+    "dx": "\n — ",
+    "dx_ety": "\n — ",
+}
+
+TAG_CROSS_REFERENCE = frozenset(
+    {
+        "a_link",
+        "d_link",
+        "i_link",
+        "et_link",
+        "mat",
+        "sx",
+        "dxt",
+    }
+)
 
-    if not first_hit:
-        return text
+_Replacement = list[tuple[str, Optional[Style]]]  # (text, style) pieces
 
-    coord = first_hit.span()
-    start_index = coord[0]
-    end_index = coord[1]
+_ITALIC = Style(italic=True)
 
-    text = text[:start_index] + replacement + text[end_index:]
 
-    return text
+def _format_tag_ds(fields: tuple[str, ...]) -> _Replacement:
+    """Format the date sense token ({ds||||}).
 
+    Only occurs in `Date`.
+    """
+    vd, sn_num, sn_letter, sn_paren = (*fields, "", "", "", "")[:4]
 
-def _stylize_at_tag_recursive(text: Text, pattern: str, replacement: Text) -> Text:
-    """Recursively replace a single tag, as regex pattern, with `Text`."""
-    simple_text = text.plain
+    match vd:
+        case "t":
+            vd_text = "transitive"
+        case "i":
+            vd_text = "intransitive"
+        case _:
+            vd_text = ""
+
+    return [
+        (", in the meaning of ", None),
+        (vd_text, _ITALIC),
+        (f"sense {sn_num}" if sn_num else "", _ITALIC),
+        (sn_letter, _ITALIC),
+        (sn_paren, _ITALIC),
+    ]
 
-    search = re.compile(pattern)
-    first_hit = search.search(simple_text)
 
-    if not first_hit:
-        return text
+@define(frozen=True)
+class TagFormatter:
+    """Tag replacements and styles, parsed once from the tag style configuration."""
 
-    coord = first_hit.span()
-    start_index = coord[0]
-    end_index = coord[1]
+    tags: StyleTagsSchema  # Copy of the configuration this was built from
+    style_hash: int
+    pair_styles: dict[str, Style]
+    # Replacements of tags that don't depend on their fields, by token kind and name
+    replacements: dict[tuple[TokenKind, str], _Replacement]
+    cross_reference: Style
 
-    text = text[:start_index] + replacement + text[end_index:]
+    @classmethod
+    def from_styles(
+        cls, tags: StyleTagsSchema, parse: Callable[[str], Style] = Style.parse
+    ) -> TagFormatter:
+        """Parse the style of each tag, and build the replacement of each tag."""
+        styles = {name: parse(str(style)) for name, style in tags.items()}
 
-    text = _stylize_at_tag_recursive(text, pattern, replacement)
+        replacements: dict[tuple[TokenKind, str], _Replacement] = {
+            ("run_in_open", ""): [("(", None)],  # Generally no space after the paren
+            ("run_in_close", ""): [(" )", None)],
+        }
 
-    return text
+        for name in TAG_PAIRS:  # Removed, styled by `format_text`
+            replacements["open", name] = []
+            replacements["close", name] = []
 
+        for name, (open_text, close_text, style_name) in TAG_BRACKETS.items():
+            style = styles[style_name] if style_name else None
+            replacements["open", name] = [(open_text, style)]
+            replacements["close", name] = [(close_text, style)]
 
-def _format_tag_ds(text: Text) -> Text:
-    """Format the date sense token ({ds||||}).
+        for name, replacement in TAG_DIRECTIONAL.items():
+            replacements["open", name] = [(replacement, None)]
+            replacements["close", name] = []
 
-    Only occurs in `Date`.
-    """
-    starting_text = Text(", in the meaning of ")
+        for name, (replacement, style_name) in TAG_SOLO.items():
+            replacements["open", name] = [(replacement, styles[style_name])]
 
-    pattern = "{ds(.*?)}"
-    searcher = re.compile(pattern)
+        return cls(
+            tags=tags.copy(),
+            style_hash=hash(tuple(sorted(tags.items()))),
+            pair_styles={tag: styles[name] for tag, name in TAG_PAIRS.items()},
+            replacements=replacements,
+            cross_reference=styles["cross_reference"],
+        )
 
-    first_hit = searcher.search(text.plain)
+    def replacement(self, token: Token) -> Optional[_Replacement]:
+        """Return the replacement for a tag, or `None` if the tag is not handled."""
+        if (replacement := self.replacements.get((token.kind, token.name))) is not None:
+            return replacement
 
-    if not first_hit:
-        return text
+        if token.kind != "open":
+            return None
 
-    _, vd, sn_num, sn_letter, sn_paren = first_hit.group().split(
-        "|"
-    )  # Mypy might complain
+        if token.name == "ds":
+            return _format_tag_ds(token.fields)
 
-    match vd:
-        case "t":
-            vd_text = Text("transitive", style="italic")
-        case "i":
-            vd_text = Text("intransitive", style="italic")
-        case _:
-            vd_text = Text("")
+        if token.name in TAG_CROSS_REFERENCE:
+            # TODO: For now, just grab the first field
+            display_text = token.fields[0] if token.fields else ""
+            return [(display_text, self.cross_reference)]
 
-    if sn_num:
-        sn_num_text = Text(f"sense {sn_num}", style="italic")
-    else:
-        sn_num_text = Text("")
+        return None
 
-    if sn_letter:
-        sn_letter_text = Text(sn_letter, style="italic")
-    else:
-        sn_letter_text = Text("")
 
-    if sn_paren:
-        sn_paren_text = Text(sn_paren[:-1], style="italic")
-    else:
-        sn_paren_text = Text("")
+_formatter: Optional[TagFormatter] = None
 
-    replacement_text = (
-        starting_text + vd_text + sn_num_text + sn_letter_text + sn_paren_text
-    )
 
-    final_text = _stylize_at_tag_recursive(text, pattern, replacement_text)
+def get_formatter() -> TagFormatter:
+    """Return the tag formatter, rebuilt if the tag styles have changed."""
+    global _formatter
 
-    return final_text
+    config = get_config()
+    tags = config.style["tags"]
+    if _formatter is None or _formatter.tags != tags:
+        _formatter = TagFormatter.from_styles(tags, config.parsed_style)
 
+    return _formatter
 
-def _format_cross_reference(text: Text, tag: str, style: str) -> Text:
-    """Format cross reference tags."""
-    pattern = f"{{{tag}(.*?)}}"
-    searcher = re.compile(pattern)
 
-    first_hit = searcher.search(text.plain)
+def _map_span(
+    runs: list[tuple[int, int, int]],
+    run_ends: list[int],
+    start: int,
+    end: int,
+    style: str | Style,
+) -> Iterator[Span]:
+    """Map a span over the markup onto the runs of markup kept in the output.
 
-    if not first_hit:
-        return text
+    `runs` holds `(markup_start, markup_end, output_start)` for each run.
+    """
+    index = bisect.bisect_right(run_ends, start)
 
-    # TODO: For now, just grab the second field
-    split = first_hit.group(1).split("|")
-    display_text = split[1]
+    for run_start, run_end, output_start in runs[index:]:
+        if run_start >= end:
+            break
 
-    replacement_text = Text(display_text, style=style)
+        span_start = max(start, run_start) - run_start + output_start
+        span_end = min(end, run_end) - run_start + output_start
 
-    final_text = _stylize_at_tag(text, pattern, replacement_text)
+        if span_end > span_start:
+            yield Span(span_start, span_end, style)
 
-    # Recursive to grab all instances of the tag
-    recursive_text = _format_cross_reference(final_text, tag, style)
 
-    return recursive_text
+FORMAT_CACHE_SIZE = 4096  # Formatted texts kept in memory
 
 
-def _format_run_in(text: Text) -> Text:
-    """Remove any erroneous newlines, often from run ins."""
-    open_pattern = r"(\(\n)"  # Generally no space after the open paren
-    close_pattern = r"(\n\s\))"
+class FormatCacheInfo(NamedTuple):
+    """Use of the `format_text` cache."""
 
-    text = _stylize_at_tag(text, open_pattern, Text("("))
-    text = _stylize_at_tag(text, close_pattern, Text(" )"))
-    return text
+    hits: int
+    misses: int
+    size: int
+    max_size: int
 
 
+@timed("format_text")
 def format_text(text: Text) -> Text:
-    """Remove tags and format the replacement text accordingly."""
-    tag_pairs = [
-        "b",
-        "it",
-        "sc",
-        "inf",
-        "sup",
-        "gloss",
-        "parahw",
-        "phrase",
-        "qword",
-        "wi",
-    ]
+    """Remove tags and format the replacement text accordingly.
 
-    tag_solo = [
-        "bc",
-        "ldquo",
-        "rdquo",
-    ]
+    Results are memoized by markup, input styles and tag styles. The caller gets
+    its own copy, so it is free to modify it.
+    """
+    formatted_text = _format_markup(
+        text.plain, text.style, tuple(text.spans), get_formatter().style_hash
+    )
 
-    tag_special = [
-        "ds",  # Date sense token
-        "ri",  # Format weird run in text
-    ]
+    return formatted_text.copy()
 
-    tag_cross_reference_pairs = [
-        "dx",
-        "dx_def",
-        "dx_ety",
-        "ma",
-    ]
 
-    tag_cross_reference = [
-        "a_link",
-        "d_link",
-        "i_link",
-        "et_link",
-        "mat",
-        "sx",
-        "dxt",
-    ]
+def format_cache_info() -> FormatCacheInfo:
+    """Return the hits and misses of the `format_text` cache."""
+    info = _format_markup.cache_info()
 
-    styles = [
-        CONFIG.style["tags"]["bold"],
-        CONFIG.style["tags"]["italic"],
-        CONFIG.style["tags"]["small_caps"],
-        CONFIG.style["tags"]["subscript"],
-        CONFIG.style["tags"]["superscript"],
-        CONFIG.style["tags"]["glossary"],
-        CONFIG.style["tags"]["paragraph_word"],
-        CONFIG.style["tags"]["phrase"],
-        CONFIG.style["tags"]["quote_word"],
-        CONFIG.style["tags"]["run_in_word"],
-        CONFIG.style["tags"]["bold_colon"],
-        CONFIG.style["tags"]["l_double_quote"],
-        CONFIG.style["tags"]["r_double_quote"],
-        None,
-        None,
-        None,
-        None,
-        None,
-        None,
-        CONFIG.style["tags"]["cross_reference"],
-        CONFIG.style["tags"]["cross_reference"],
-        CONFIG.style["tags"]["cross_reference"],
-        CONFIG.style["tags"]["cross_reference"],
-        CONFIG.style["tags"]["cross_reference"],
-        CONFIG.style["tags"]["cross_reference"],
-        CONFIG.style["tags"]["cross_reference"],
-    ]
+    return FormatCacheInfo(info.hits, info.misses, info.currsize, FORMAT_CACHE_SIZE)
 
-    replacements = [  # When a token is entirely substituted
-        ": ",
-        '"',
-        '"',
-    ]
-
-    all_replacements: list[None | str] = [
-        *[None] * len(tag_pairs),
-        *replacements,
-        *[None] * len(tag_special),
-        *[None] * len(tag_cross_reference_pairs),
-        *[None] * len(tag_cross_reference),
-    ]
 
-    all_tags = [
-        *tag_pairs,
-        *tag_solo,
-        *tag_special,
-        *tag_cross_reference_pairs,
-        *tag_cross_reference,
-    ]
+def clear_format_cache() -> None:
+    """Empty the `format_text` cache, and reset its counters."""
+    _format_markup.cache_clear()
 
-    for tag, style, replacement in zip(all_tags, styles, all_replacements):
-        match tag:
-            case (
-                "b"
-                | "it"
-                | "sc"
-                | "inf"
-                | "sup"
-                | "parahw"
-                | "phrase"
-                | "qword"
-                | "wi"
-            ):
-                open_pattern = f"{{{tag}}}"
-                close_pattern = rf"{{/{tag}}}"
-                between_pattern = f"(?<={{{tag}}})(.*?)(?={{\\/{tag}}})"
 
-                text.highlight_regex(between_pattern, Style.parse(style))
+@functools.lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def _format_markup(
+    markup: str, style: str | Style, spans: tuple[Span, ...], style_hash: int
+) -> Text:
+    """Format markup. Never modify the result, which is shared between callers.
 
-                text = _remove_tag_pair(text, open_pattern, close_pattern)
+    `style_hash` is only part of the cache key, as the tag styles are.
+    """
+    return _format_text(Text(markup, style=style, spans=list(spans)), get_formatter())
 
-            case "gloss":
-                open_pattern = "{gloss}"
-                close_pattern = r"{/gloss}"
 
-                open_replacement = Text("[", style=style)
-                close_replacement = Text("]", style=style)
+def _format_text(text: Text, formatter: TagFormatter) -> Text:
+    """Remove tags and format the replacement text accordingly.
 
-                open_text = _stylize_at_tag(text, open_pattern, open_replacement)
-                text = _stylize_at_tag(open_text, close_pattern, close_replacement)
+    The markup is tokenized in one pass, and the formatted `Text` is built once.
+    Text from the markup keeps the styles of `text`, and of any enclosing tag
+    pairs. Replacement text is styled only by its own tag.
+    """
+    markup = text.plain
 
-            # TODO: Refactor into function with "gloss"
-            case "dx_def":
-                open_pattern = "{dx_def}"
-                close_pattern = r"{/dx_def}"
+    pieces: list[str] = []
+    runs: list[tuple[int, int, int]] = []
+    replacement_spans: list[Span] = []
+    length = 0
 
-                open_replacement = Text("(", style=style)
-                close_replacement = Text(")", style=style)
+    pair_spans: dict[str, list[tuple[int, int]]] = {tag: [] for tag in TAG_PAIRS}
+    open_pairs: dict[str, int] = {}  # Tag to the end of its open tag
 
-                open_text = _stylize_at_tag(text, open_pattern, open_replacement)
-                text = _stylize_at_tag(open_text, close_pattern, close_replacement)
+    for token in tokenize(markup):
+        value = markup[token.start : token.end]
 
-            case "bc" | "ldquo" | "rdquo":
-                pattern = f"{{{tag}}}*"
+        if "\n" in value:
+            # Tag pairs are only styled within a line
+            open_pairs.clear()
 
-                if not replacement:
-                    raise ValueError("Missing required text.")
+        replacement = formatter.replacement(token)
 
-                replacement_text = Text(replacement, Style.parse(style))
+        if replacement is None:  # Text, or a tag we don't handle
+            runs.append((token.start, token.end, length))
+            pieces.append(value)
+            length += len(value)
+            continue
 
-                text = _stylize_at_tag(text, pattern, replacement_text)
+        if token.name in TAG_PAIRS:
+            if token.kind == "open":
+                open_pairs.setdefault(token.name, token.end)
+            elif (pair_start := open_pairs.pop(token.name, None)) is not None:
+                pair_spans[token.name].append((pair_start, token.start))
 
-            case "ds":
-                text = _format_tag_ds(text)
+        for replacement_text, style in replacement:
+            if style and replacement_text:
+                replacement_spans.append(
+                    Span(length, length + len(replacement_text), style)
+                )
+            pieces.append(replacement_text)
+            length += len(replacement_text)
 
-            case "ri":
-                text = _format_run_in(text)
+    run_ends = [run_end for _, run_end, _ in runs]
+    spans: list[Span] = []
 
-            case "dx" | "dt_ety":
-                open_pattern = f"{{{tag}}}"
-                close_pattern = rf"{{/{tag}}}"
+    if text.style:
+        spans.extend(_map_span(runs, run_ends, 0, len(markup), text.style))
 
-                replacement_text = Text("\n — ")
+    for span in text.spans:
+        spans.extend(_map_span(runs, run_ends, span.start, span.end, span.style))
 
-                text = _stylize_at_tag(text, open_pattern, replacement_text)
-                text = _remove_tag_pair(text, open_pattern, close_pattern)
+    for tag, pair_style in formatter.pair_styles.items():
+        for start, end in pair_spans[tag]:
+            spans.extend(_map_span(runs, run_ends, start, end, pair_style))
 
-            case "a_link" | "d_link" | "i_link" | "et_link" | "mat" | "sx" | "dxt":
-                text = _format_cross_reference(text, tag, style)
+    spans.extend(replacement_spans)
 
-            case _:
-                # Not handled
-                pass
-    return text
+    return Text("".join(pieces), spans=spans)
@@ -1,9 +1,10 @@
 """Common functions for formating specific API elements."""
 from typing import Optional
 
+from rich.style import Style
 from rich.text import Text
 
-from dicc.config.main import CONFIG
+from dicc.config.main import get_config
 from dicc.display.common import format_text
 from dicc.responses.collegiate import (
     AttributionQuote,
@@ -19,6 +20,12 @@ from dicc.responses.collegiate import (
 from dicc.terminal import console
 
 
+def _definition_style() -> Style:
+    """Return the parsed style of defining text."""
+    config = get_config()
+    return config.parsed_style(config.style["display"]["definition_content"])
+
+
 def format_aq(aq: AttributionQuote) -> Text:
     """Construct and format `Text` from an attribution quote.
 
@@ -182,9 +189,7 @@ def format_dt(dt: DefiningText) -> Text:
 
     for item in dt:
         if item[0] == "text":
-            dt_element_line = Text(
-                item[1], style=CONFIG.style["display"]["definition_content"]
-            )
+            dt_element_line = Text(item[1], style=_definition_style())
             items.append(dt_element_line)
 
         elif item[0] == "uns":
@@ -207,7 +212,7 @@ def format_dt(dt: DefiningText) -> Text:
 
         elif item[0] == "ri":
             ri_line = format_ri(item[1])
-            ri_line.stylize(CONFIG.style["display"]["definition_content"])
+            ri_line.stylize(_definition_style())
             items.append(ri_line)
 
         elif item[0] == "snote":
@@ -0,0 +1,66 @@
+"""Tokenize Merriam-Webster's `{tag}...{/tag}` text markup.
+
+The tokenizer walks the raw string once and yields a flat stream of tokens. It
+does not know what any tag means; `dicc.display.common.format_text` decides how
+each tag is styled, replaced or removed.
+"""
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Literal, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+TokenKind = Literal["text", "open", "close", "run_in_open", "run_in_close"]
+
+# `{tag}`, `{/tag}` and `{tag|field|field}`. Fields never span lines.
+_TOKEN_PATTERN = re.compile(
+    r"\{(?P<close>/)?(?P<name>[a-z_]+)(?P<fields>(?:\|[^{}\n]*)?)\}"
+    r"|(?P<run_in_open>\(\n)"  # Erroneous newlines, often from run ins
+    r"|(?P<run_in_close>\n\s\))"
+)
+
+
+class Token(NamedTuple):
+    """A single token of Merriam-Webster markup.
+
+    `start` and `end` index into the raw string. Tags with no `|` have no fields.
+    """
+
+    kind: TokenKind
+    name: str
+    fields: tuple[str, ...]
+    start: int
+    end: int
+
+
+def tokenize(markup: str) -> Iterator[Token]:
+    """Split markup into text and tag tokens, in one left-to-right pass."""
+    position = 0
+
+    for match in _TOKEN_PATTERN.finditer(markup):
+        start, end = match.span()
+
+        if start > position:
+            yield Token("text", "", (), position, start)
+
+        if match.group("run_in_open"):
+            yield Token("run_in_open", "", (), start, end)
+        elif match.group("run_in_close"):
+            yield Token("run_in_close", "", (), start, end)
+        else:
+            kind: TokenKind = "close" if match.group("close") else "open"
+            fields = match.group("fields")
+            yield Token(
+                kind,
+                match.group("name"),
+                tuple(fields.split("|")[1:]) if fields else (),
+                start,
+                end,
+            )
+
+        position = end
+
+    if position < len(markup):
+        yield Token("text", "", (), position, len(markup))
@@ -0,0 +1,224 @@
+"""Plain text, JSON and Markdown output, for when the output is not a terminal.
+
+Entries are walked directly, and markup is stripped with the tokenizer. No `rich`
+renderables are built, so there is no layout to pay for.
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import TYPE_CHECKING, Any, Literal
+
+from dicc.display.collegiate import Collegiate
+from dicc.display.common import get_formatter
+from dicc.display.markup import tokenize
+from dicc.display.no_response import InvalidSearch
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator, Sequence
+
+    from dicc.responses.abstract import MerriamWebsterItem
+
+OutputFormat = Literal["rich", "plain", "json", "markdown"]
+
+_MARKDOWN_SPECIAL = re.compile(r"([\\`*_\[\]<>#|])")
+
+
+def strip_markup(markup: str) -> str:
+    """Return markup as plain text, with tags replaced or removed as when styled."""
+    formatter = get_formatter()
+    pieces = []
+
+    for token in tokenize(markup):
+        replacement = formatter.replacement(token)
+
+        if replacement is None:  # Text, or a tag we don't handle
+            pieces.append(markup[token.start : token.end])
+        else:
+            pieces.extend(text for text, _ in replacement)
+
+    return "".join(pieces)
+
+
+def _sense_data(sense: Any) -> dict[str, Any]:
+    """Return the text, examples and usage notes of one sense."""
+    text: list[str] = []
+    examples: list[str] = []
+    notes: list[str] = []
+
+    for kind, value in sense.get("dt", []):
+        if kind == "text":
+            text.append(strip_markup(value))
+        elif kind == "vis":
+            examples.extend(strip_markup(vis["t"]) for vis in value)
+        elif kind == "uns":
+            for usage_note in value:
+                for note_kind, note_value in usage_note:
+                    if note_kind == "text":
+                        notes.append(strip_markup(note_value))
+                    elif note_kind == "vis":
+                        examples.extend(strip_markup(vis["t"]) for vis in note_value)
+
+    for kind, value in sense.get("et", []):  # Truncated senses
+        if kind == "text":
+            text.append(strip_markup(value))
+
+    return {
+        "number": sense.get("sn"),
+        "text": " ".join(text).strip(),
+        "examples": examples,
+        "notes": notes,
+    }
+
+
+def _senses(sense_sequence: Any) -> Iterator[dict[str, Any]]:
+    """Yield each sense of a sense sequence, as in `Collegiate.format_defns`."""
+    for sense_group in sense_sequence:
+        for kind, value in sense_group:
+            match kind:
+                case "sense" | "sen":
+                    yield _sense_data(value)
+                case "bs":
+                    yield _sense_data(value["sense"])
+                case "pseq":
+                    for pseq_kind, pseq_value in value:
+                        if pseq_kind == "sense":
+                            yield _sense_data(pseq_value)
+                        elif pseq_kind == "bs":
+                            yield _sense_data(pseq_value["sense"])
+
+
+def entry_data(item: Collegiate) -> dict[str, Any]:
+    """Return the parts of an entry that are displayed, as plain JSON data."""
+    return {
+        "id": item.meta["id"],
+        "headword": item.hwi["hw"],
+        "functional_label": item.fl,
+        "pronunciations": [pron["mw"] for pron in item.hwi.get("prs", [])],
+        "definitions": [
+            {
+                "verb_divider": defn.get("vd"),
+                "senses": list(_senses(defn.get("sseq", []))),
+            }
+            for defn in item.defn or []
+        ],
+        "short_definitions": item.shortdef or [],
+        "stems": item.meta.get("stems", []),
+        "first_known_use": strip_markup(item.date) if item.date else None,
+        "examples": [strip_markup(quote["t"]) for quote in item.quotes or []],
+    }
+
+
+def result_data(word: str, result: Sequence[MerriamWebsterItem]) -> dict[str, Any]:
+    """Return the entries found for a searched word, and any alternate terms."""
+    return {
+        "word": word,
+        "entries": [
+            entry_data(item) for item in result if isinstance(item, Collegiate)
+        ],
+        "suggestions": [
+            item.alternate_term for item in result if isinstance(item, InvalidSearch)
+        ],
+    }
+
+
+def format_json(word: str, result: Sequence[MerriamWebsterItem]) -> str:
+    """Format the results of a search as one line of JSON."""
+    return json.dumps(result_data(word, result), ensure_ascii=False) + "\n"
+
+
+def format_plain(word: str, result: Sequence[MerriamWebsterItem]) -> str:
+    """Format the results of a search as plain text."""
+    data = result_data(word, result)
+    lines = [word.upper()]
+
+    if data["suggestions"]:
+        lines.append("No results found. Perhaps you meant one of the following?")
+        lines.extend(f"  {suggestion}" for suggestion in data["suggestions"])
+
+    for index, entry in enumerate(data["entries"], start=1):
+        title = entry["id"].replace(":", " : ")
+        if label := entry["functional_label"]:
+            title += f" ({label})"
+        lines.extend(["", f"{index}. {title}"])
+
+        if entry["pronunciations"]:
+            lines.append(" | ".join(entry["pronunciations"]))
+
+        for defn in entry["definitions"]:
+            if defn["verb_divider"]:
+                lines.append(defn["verb_divider"])
+            for sense in defn["senses"]:
+                lines.append(f"  {sense['number'] or ''} {sense['text']}".rstrip())
+                lines.extend(f"      // {example}" for example in sense["examples"])
+                lines.extend(f"      -> {note}" for note in sense["notes"])
+
+        if not entry["definitions"]:
+            lines.extend(f"  • {short}" for short in entry["short_definitions"])
+
+        if entry["stems"]:
+            lines.append(f"Stems: {' | '.join(entry['stems'])}")
+        if entry["first_known_use"]:
+            lines.append(f"First Known Use: {entry['first_known_use']}")
+        if entry["examples"]:
+            lines.append("Examples:")
+            lines.extend(f"  {example}" for example in entry["examples"])
+
+    return "\n".join(lines) + "\n\n"
+
+
+def _escape(text: str) -> str:
+    return _MARKDOWN_SPECIAL.sub(r"\\\1", text)
+
+
+def format_markdown(word: str, result: Sequence[MerriamWebsterItem]) -> str:
+    """Format the results of a search as Markdown."""
+    data = result_data(word, result)
+    lines = [f"# {_escape(word)}", ""]
+
+    if data["suggestions"]:
+        lines.extend(["No results found. Perhaps you meant one of the following?", ""])
+        lines.extend(f"- {_escape(suggestion)}" for suggestion in data["suggestions"])
+        lines.append("")
+
+    for index, entry in enumerate(data["entries"], start=1):
+        title = _escape(entry["id"].replace(":", " : "))
+        if label := entry["functional_label"]:
+            title += f" *{_escape(label)}*"
+        lines.extend([f"## {index}. {title}", ""])
+
+        if entry["pronunciations"]:
+            lines.extend([_escape(" | ".join(entry["pronunciations"])), ""])
+
+        for defn in entry["definitions"]:
+            if defn["verb_divider"]:
+                lines.extend([f"**{_escape(defn['verb_divider'])}**", ""])
+            for sense in defn["senses"]:
+                number = f"**{_escape(sense['number'])}** " if sense["number"] else ""
+                lines.append(f"- {number}{_escape(sense['text'])}")
+                lines.extend(f"  - *{_escape(ex)}*" for ex in sense["examples"])
+                lines.extend(f"  - {_escape(note)}" for note in sense["notes"])
+            lines.append("")
+
+        if not entry["definitions"] and entry["short_definitions"]:
+            lines.extend(f"- {_escape(short)}" for short in entry["short_definitions"])
+            lines.append("")
+
+        if entry["stems"]:
+            lines.extend([f"**Stems:** {_escape(', '.join(entry['stems']))}", ""])
+        if entry["first_known_use"]:
+            first_known_use = _escape(entry["first_known_use"])
+            lines.extend([f"**First Known Use:** {first_known_use}", ""])
+        if entry["examples"]:
+            lines.extend(["**Examples:**", ""])
+            lines.extend(f"- {_escape(example)}" for example in entry["examples"])
+            lines.append("")
+
+    return "\n".join(lines) + "\n"
+
+
+FORMATTERS: dict[str, Callable[[str, Sequence[MerriamWebsterItem]], str]] = {
+    "plain": format_plain,
+    "json": format_json,
+    "markdown": format_markdown,
+}
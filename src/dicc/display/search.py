@@ -0,0 +1,38 @@
+"""Display the results of a search."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from rich.console import Group
+from rich.panel import Panel
+from rich.text import Text
+
+from dicc.display.no_response import InvalidSearch
+
+if TYPE_CHECKING:
+    from rich.console import RenderableType
+
+    from dicc.responses.abstract import MerriamWebsterItem
+
+NO_RESULTS_MESSAGE = (
+    "No results found for the searched term. Perhaps you meant one of the following?"
+)
+
+
+def format_search(word: str, result: list[MerriamWebsterItem]) -> RenderableType:
+    """Format the items found for a searched word in a panel.
+
+    If nothing was found, the panel of alternate search terms follows a message.
+    """
+    dict_item_renderables = Group(*result)
+
+    panel = Panel(
+        dict_item_renderables,
+        title=Text(word.upper(), style="bold white"),
+        title_align="center",
+    )
+
+    if result and not isinstance(result[0], InvalidSearch):
+        return panel
+
+    return Group(Text(NO_RESULTS_MESSAGE, style="italic red"), panel)
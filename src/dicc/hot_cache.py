@@ -0,0 +1,265 @@
+"""Responses kept in memory, parsed, in front of the cache database.
+
+Long-lived processes, such as the daemon and `dicc stream`, see the same words
+again and again. A hit in memory skips the database query, the decompression,
+parsing the response and the write marking the row accessed. Accesses are
+written back in one batch by `HotCache.flush`, so least recently used eviction
+and hit counts stay accurate.
+"""
+from __future__ import annotations
+
+import datetime
+from collections import Counter, OrderedDict
+from typing import TYPE_CHECKING, NamedTuple
+
+from attrs import define, field
+
+from dicc import cache
+from dicc.config.main import get_config
+
+if TYPE_CHECKING:
+    import sqlite3
+    from collections.abc import Sequence
+    from typing import Any, Optional
+
+    from dicc.cache import CacheRecord
+    from dicc.query.common import MerriamWebsterQuery
+    from dicc.responses.abstract import MerriamWebsterItem
+
+DEFAULT_MEMORY_SIZE = 4  # Megabytes
+
+
+class HotEntry(NamedTuple):
+    """A cached response, parsed into items to display."""
+
+    cache_key: str  # Of its row, which a stem is not
+    created_timestamp: datetime.datetime
+    items: list[MerriamWebsterItem]
+    response_hash: str  # Of the raw response, to find its rendered output
+    size: int  # Bytes of the raw response
+
+
+class HotCacheStats(NamedTuple):
+    """Lookups answered from memory, and what is held there."""
+
+    hits: int
+    misses: int
+    entries: int
+    size: int  # Bytes
+    max_size: int  # Bytes
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of lookups answered from memory."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def memory_size() -> int:
+    """Return the configured most bytes of responses to keep in memory."""
+    return get_config().cache.get("memory_size", DEFAULT_MEMORY_SIZE) * 1024 * 1024
+
+
+def _entry(
+    query: MerriamWebsterQuery, response: bytes, json_response: Any
+) -> HotEntry:
+    """Parse a decoded response of the cache, for the query it was fetched by."""
+    from dicc.query.common import parse_json
+
+    return HotEntry(
+        query.cache_key,
+        query.timestamp,
+        parse_json(query, json_response),
+        cache.response_hash(response),
+        len(response),
+    )
+
+
+def parse_row(row: CacheRecord) -> HotEntry:
+    """Parse a row of the cache, as `parse_response` does.
+
+    Raises `ValueError` if its response is not JSON.
+    """
+    # Parsing imports the display modules, which `dicc cache stats` doesn't need
+    from dicc.query.common import MerriamWebsterQuery, decode_response
+
+    created = row.created_timestamp
+    if isinstance(created, str):  # As read from the database
+        created = datetime.datetime.fromisoformat(created)
+
+    query = MerriamWebsterQuery(row.word, created, row.search_method, row.cache_key)
+
+    return _entry(query, row.response, decode_response(row.response))
+
+
+def insert_parsed(
+    con: sqlite3.Connection,
+    responses: Sequence[tuple[MerriamWebsterQuery, bytes]],
+) -> list[HotEntry]:
+    """Insert many queries into the cache database, and return them parsed.
+
+    Each response is decoded once, for both its stems and its items. Raises
+    `ValueError` if a response is not JSON, once all are inserted.
+    """
+    from dicc.query.common import decode_response
+
+    decoded = []
+    stems: dict[str, set[str]] = {}
+    error: Optional[ValueError] = None
+
+    for query, response in responses:
+        try:
+            json_response = decode_response(response)
+        except ValueError as invalid:  # Cached all the same, without stems
+            error = error or invalid
+            stems[query.cache_key] = set()
+            continue
+
+        decoded.append((query, response, json_response))
+        stems[query.cache_key] = cache.json_stems(query.word, json_response)
+
+    cache.insert_rows(con, responses, stems)
+
+    if error is not None:
+        raise error
+
+    return [_entry(*parsed) for parsed in decoded]
+
+
+@define
+class HotCache:
+    """Least recently used rows of the cache, parsed, bounded by their raw bytes.
+
+    Rows are read through from the database, and written through to it. Rows
+    found by stem are kept under the searched key too. Rows that expire, or are
+    deleted or replaced in the database by any process, are dropped. Not thread
+    safe.
+    """
+
+    max_size: int = field(factory=memory_size)
+    hits: int = 0
+    misses: int = 0
+    size: int = 0
+    _rows: OrderedDict[str, HotEntry] = field(factory=OrderedDict)
+    _accessed: Counter[str] = field(factory=Counter)  # Hits not yet written
+    _generation: int = -1  # Of the database, when rows were last checked
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    @property
+    def unwritten(self) -> int:
+        """Rows accessed in memory since the last `flush`."""
+        return len(self._accessed)
+
+    def _store(self, key: str, entry: HotEntry) -> None:
+        self._discard(key)
+
+        if entry.size > self.max_size:
+            return
+
+        self._rows[key] = entry
+        self.size += entry.size
+
+        while self.size > self.max_size:
+            _, evicted = self._rows.popitem(last=False)
+            self.size -= evicted.size
+
+    def _discard(self, key: str) -> None:
+        if (entry := self._rows.pop(key, None)) is not None:
+            self.size -= entry.size
+
+    def _check_changed(self, con: sqlite3.Connection) -> None:
+        """Drop rows deleted or replaced in the database since last checked."""
+        generation = cache.get_generation(con)
+        if generation == self._generation:
+            return
+
+        versions = cache.cached_versions(con, list(self._rows))
+        for key, entry in list(self._rows.items()):
+            if versions.get(key) != (entry.cache_key, entry.created_timestamp):
+                self._discard(key)
+
+        self._generation = generation
+
+    def get_entries(
+        self, con: sqlite3.Connection, keys: Sequence[str], stems: bool = True
+    ) -> dict[str, HotEntry]:
+        """Return the parsed rows for many keys, by key, as `cache.get_rows` does.
+
+        Keys in memory are answered without reading the database. Unless `stems`,
+        rows held under a key only as a stem of another word are not used. Raises
+        `ValueError` if a response read is not JSON.
+        """
+        self._check_changed(con)
+        oldest = cache.expiry()
+
+        entries: dict[str, HotEntry] = {}
+        cold_keys = []
+
+        for key in dict.fromkeys(keys):
+            entry = self._rows.get(key)
+
+            if entry is not None and entry.created_timestamp < oldest:
+                self._discard(key)  # Expired, and deleted when read from disk
+                entry = None
+
+            if entry is None or (not stems and entry.cache_key != key):
+                cold_keys.append(key)
+                continue
+
+            self._rows.move_to_end(key)
+            self._accessed[entry.cache_key] += 1
+            entries[key] = entry
+
+        self.hits += len(entries)
+        self.misses += len(cold_keys)
+
+        if cold_keys:
+            for key, row in cache.get_rows(con, cold_keys, stems).items():
+                entries[key] = parse_row(row)
+                self._store(key, entries[key])
+
+        return entries
+
+    def get_entry(
+        self, con: sqlite3.Connection, key: str, stems: bool = True
+    ) -> Optional[HotEntry]:
+        """Return a parsed row, from memory when possible, as `cache.get_row` does."""
+        return self.get_entries(con, [key], stems).get(key)
+
+    def insert_rows(
+        self,
+        con: sqlite3.Connection,
+        responses: Sequence[tuple[MerriamWebsterQuery, bytes]],
+    ) -> list[HotEntry]:
+        """Insert many queries into the cache database, and keep them in memory.
+
+        Raises `ValueError` if a response is not JSON, once all are inserted.
+        """
+        entries = insert_parsed(con, responses)
+
+        for entry in entries:
+            self._store(entry.cache_key, entry)
+
+        return entries
+
+    def insert_row(
+        self, con: sqlite3.Connection, query: MerriamWebsterQuery, response: bytes
+    ) -> HotEntry:
+        """Insert a query into the cache database, and keep it in memory."""
+        (entry,) = self.insert_rows(con, [(query, response)])
+
+        return entry
+
+    def flush(self, con: sqlite3.Connection) -> None:
+        """Write the accesses answered from memory to the cache database."""
+        if self._accessed:
+            cache.touch_rows(con, self._accessed)
+            self._accessed.clear()
+
+    def stats(self) -> HotCacheStats:
+        """Return the lookups answered so far, and the rows held."""
+        return HotCacheStats(
+            self.hits, self.misses, len(self._rows), self.size, self.max_size
+        )
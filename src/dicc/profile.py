@@ -0,0 +1,144 @@
+"""Time the stages of a search.
+
+Stages are only timed while a profile is active. Otherwise, `stage` and `timed`
+cost one global lookup, so they can stay in place on hot paths.
+"""
+from __future__ import annotations
+
+import functools
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Optional, ParamSpec, TypeVar
+
+from attrs import define, field
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+    from rich.table import Table
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+_active: Optional[Profile] = None
+
+
+@define
+class StageTiming:
+    """Time spent in one stage, excluding the stages nested in it."""
+
+    calls: int = 0
+    seconds: float = 0.0
+
+
+@define
+class Profile:
+    """Timings of the stages run while profiling."""
+
+    stages: dict[str, StageTiming] = field(factory=dict)
+    start: float = field(factory=time.perf_counter)
+    end: Optional[float] = None
+    # Time spent in nested stages, for each stage being timed
+    _nested: list[float] = field(factory=list)
+
+    @property
+    def total(self) -> float:
+        """Seconds from the start of the profile to its end, or to now."""
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add one call of `seconds` to a stage."""
+        timing = self.stages.setdefault(name, StageTiming())
+        timing.calls += 1
+        timing.seconds += seconds
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the timings, in seconds, as JSON-serializable data."""
+        return {
+            "total": self.total,
+            "stages": {
+                name: {"calls": timing.calls, "seconds": timing.seconds}
+                for name, timing in self.stages.items()
+            },
+        }
+
+    def table(self) -> Table:
+        """Return the timings as a table, slowest stage first."""
+        from rich.table import Table
+
+        total = self.total
+        other = total - sum(timing.seconds for timing in self.stages.values())
+
+        table = Table(title="Profile", title_justify="left")
+        table.add_column("Stage")
+        table.add_column("Calls", justify="right")
+        table.add_column("Time (ms)", justify="right")
+        table.add_column("Share", justify="right")
+
+        rows = sorted(self.stages.items(), key=lambda item: -item[1].seconds)
+        for name, timing in [*rows, ("other", StageTiming(0, max(other, 0.0)))]:
+            table.add_row(
+                name,
+                str(timing.calls) if timing.calls else "",
+                f"{timing.seconds * 1000:.2f}",
+                f"{timing.seconds / total:.1%}" if total else "",
+            )
+
+        table.add_section()
+        table.add_row("total", "", f"{total * 1000:.2f}", "")
+
+        return table
+
+
+@contextmanager
+def profiling() -> Iterator[Profile]:
+    """Time every stage run within the block."""
+    global _active
+
+    profile = Profile()
+    _active = profile
+
+    try:
+        yield profile
+    finally:
+        profile.end = time.perf_counter()
+        _active = None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the block as the stage `name`, if profiling."""
+    if (profile := _active) is None:
+        yield
+        return
+
+    profile._nested.append(0.0)
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = profile._nested.pop()
+        if profile._nested:
+            profile._nested[-1] += elapsed
+
+        profile.record(name, elapsed - nested)
+
+
+def timed(name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Time each call of the decorated function as the stage `name`."""
+
+    def decorator(function: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(function)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if _active is None:
+                return function(*args, **kwargs)
+
+            with stage(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,83 @@
+"""Managed HTTP clients for Merriam-Webster's API.
+
+One `httpx.Client` is shared by every lookup in the process, so connections are
+pooled and kept alive across searches. It is closed when the process exits.
+"""
+from __future__ import annotations
+
+import atexit
+import importlib.util
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+from dicc.config.main import get_config
+
+if TYPE_CHECKING:
+    from typing import Optional
+
+# As in the default configuration, for keys a user `[http]` table leaves out
+DEFAULT_HTTP2 = False
+DEFAULT_TIMEOUT = 10.0  # Seconds
+DEFAULT_CONNECT_TIMEOUT = 5.0  # Seconds
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 5
+DEFAULT_KEEPALIVE_EXPIRY = 30.0  # Seconds
+
+_client: Optional[httpx.Client] = None
+
+
+def client_options() -> dict[str, Any]:
+    """Return the `httpx` client options from the user configuration."""
+    http = get_config().http
+
+    # HTTP/2 needs the optional `h2` package
+    http2 = (
+        http.get("http2", DEFAULT_HTTP2) and importlib.util.find_spec("h2") is not None
+    )
+
+    return {
+        "http2": http2,
+        "timeout": httpx.Timeout(
+            http.get("timeout", DEFAULT_TIMEOUT),
+            connect=http.get("connect_timeout", DEFAULT_CONNECT_TIMEOUT),
+        ),
+        "limits": httpx.Limits(
+            max_connections=http.get("max_connections", DEFAULT_MAX_CONNECTIONS),
+            max_keepalive_connections=http.get(
+                "max_keepalive_connections", DEFAULT_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            keepalive_expiry=http.get("keepalive_expiry", DEFAULT_KEEPALIVE_EXPIRY),
+        ),
+    }
+
+
+def get_client() -> httpx.Client:
+    """Return the shared client, creating it on first use."""
+    global _client
+
+    if _client is None or _client.is_closed:
+        _client = httpx.Client(**client_options())
+
+    return _client
+
+
+def close_client() -> None:
+    """Close the shared client, and its pooled connections."""
+    global _client
+
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+def async_client() -> httpx.AsyncClient:
+    """Return a new async client, configured like the shared client.
+
+    Async clients are bound to an event loop, so use one per batch of lookups, as
+    an async context manager.
+    """
+    return httpx.AsyncClient(**client_options())
+
+
+atexit.register(close_client)
@@ -1,22 +1,38 @@
-"""Common functions for the `query` subpackage."""
+"""Common functions for the `query` subpackage.
+
+The HTTP client and API keys are only imported to fetch, so a search answered by
+the cache does not load them.
+"""
 from __future__ import annotations
 
 import datetime
 import json
 import sqlite3
+from collections import Counter
 from typing import TYPE_CHECKING, NamedTuple
 
-import httpx
-from rich.text import Text
-
-from dicc import cache, url
+from dicc import cache
 from dicc.display.collegiate import Collegiate
 from dicc.display.no_response import InvalidSearch
-from dicc.terminal import console
+from dicc.hot_cache import insert_parsed
+from dicc.profile import stage
 
 if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+    from typing import Any, Optional, TypeAlias
+
+    import httpx
+
+    from dicc.hot_cache import HotCache, HotEntry
     from dicc.responses.abstract import MerriamWebsterItem
     from dicc.responses.collegiate import CollegiateResponse
+    from dicc.url import QueryMethod
+
+    # A response body, or the error fetching it
+    Fetched: TypeAlias = bytes | httpx.HTTPError
+
+    # As fetched, or parsed already when held in memory
+    Resolved: TypeAlias = bytes | HotEntry | httpx.HTTPError
 
 
 class MerriamWebsterQuery(NamedTuple):
@@ -24,48 +40,175 @@ class MerriamWebsterQuery(NamedTuple):
 
     word: str
     timestamp: datetime.datetime
-    method: url.QueryMethod
-    query_url: httpx.URL
+    method: QueryMethod
+    cache_key: str
 
 
-def create_query(word: str, method: url.QueryMethod) -> MerriamWebsterQuery:
+def create_query(word: str, method: QueryMethod) -> MerriamWebsterQuery:
     """Create the seach query."""
-    url_ = url.build_url(word, method)
-    query_ = MerriamWebsterQuery(word, datetime.datetime.now(), method, url_)
+    key = cache.cache_key(word, method)
+    query_ = MerriamWebsterQuery(word, datetime.datetime.now(), method, key)
 
     return query_
 
 
-def process_query(
-    query: MerriamWebsterQuery,
+def resolve_responses(
+    queries: Sequence[MerriamWebsterQuery],
     con: sqlite3.Connection,
-    client: httpx.Client,
+    fetch: Callable[[list[MerriamWebsterQuery]], list[Fetched]],
+    exact: bool = False,
+    hot: Optional[HotCache] = None,
+) -> dict[str, Resolved]:
+    """Return the raw response for each query, or the error fetching it, by key.
+
+    Cache hits are read with one bulk query, including stems unless `exact`. Each
+    missing key is fetched once, in one call to `fetch`, and the responses are
+    cached with one batched insert, and returned parsed. A word that fails to
+    fetch does not fail the others. With a `hot` cache, cache hits are its parsed
+    entries instead, read from memory when it holds them, and rows read or
+    inserted are kept in it.
+    """
+    keys = [query.cache_key for query in queries]
+    responses: dict[str, Resolved] = {}
+
+    with stage("cache"):
+        if hot is not None:
+            responses.update(hot.get_entries(con, keys, stems=not exact))
+        else:
+            for key, record in cache.get_rows(con, keys, stems=not exact).items():
+                responses[key] = record.response
+
+    misses = list(
+        {
+            query.cache_key: query
+            for query in queries
+            if query.cache_key not in responses
+        }.values()
+    )
+
+    if misses:
+        import httpx
+
+        with stage("network"):
+            fetched = fetch(misses)
+
+        found = [
+            (query, response)
+            for query, response in zip(misses, fetched)
+            if isinstance(response, bytes)
+        ]
+        # Errors with a status were sent, and counted by the API
+        sent = [
+            query
+            for query, response in zip(misses, fetched)
+            if isinstance(response, (bytes, httpx.HTTPStatusError))
+        ]
+
+        for query, response in zip(misses, fetched):
+            responses[query.cache_key] = response
+
+        with stage("cache"):
+            for method, requests in Counter(q.method for q in sent).items():
+                cache.record_api_usage(con, method, requests)
+
+            # Parsed as they are inserted, so each is decoded once
+            if hot is not None:
+                entries = hot.insert_rows(con, found)
+            else:
+                entries = insert_parsed(con, found)
+
+            for entry in entries:
+                responses[entry.cache_key] = entry
+
+    return responses
+
+
+def fetch_response(query: MerriamWebsterQuery, client: httpx.Client) -> bytes:
+    """Send a query to Merriam-Webster's API, and return the raw response body."""
+    from dicc import url
+
+    # Only build the URL, with its API key, when we need to send it
+    query_url = url.build_url(query.word, query.method)
+
+    return client.get(query_url).raise_for_status().content
+
+
+def try_fetch_response(query: MerriamWebsterQuery, client: httpx.Client) -> Fetched:
+    """Fetch a query as `fetch_response` does, returning any error instead."""
+    import httpx
+
+    try:
+        return fetch_response(query, client)
+    except httpx.HTTPError as error:
+        return error
+
+
+async def fetch_responses(
+    queries: Sequence[MerriamWebsterQuery],
+    concurrency: int,
+) -> list[Fetched]:
+    """Send many queries to Merriam-Webster's API concurrently.
+
+    At most `concurrency` requests are in flight at once. Responses, or the error
+    fetching each, are returned in the order of `queries`.
+    """
+    import asyncio
+
+    import httpx
+
+    from dicc import url
+    from dicc.query.client import async_client
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with async_client() as client:
+
+        async def fetch(query: MerriamWebsterQuery) -> bytes:
+            query_url = url.build_url(query.word, query.method)
+            async with semaphore:
+                response = await client.get(query_url)
+            return response.raise_for_status().content
+
+        results = await asyncio.gather(
+            *(fetch(query) for query in queries), return_exceptions=True
+        )
+
+    fetched: list[Fetched] = []
+    for result in results:
+        if not isinstance(result, (bytes, httpx.HTTPError)):
+            raise result  # Not a failed request, but a bug or a cancellation
+        fetched.append(result)
+
+    return fetched
+
+
+def parse_response(
+    query: MerriamWebsterQuery,
+    raw_response: bytes,
 ) -> list[MerriamWebsterItem]:
-    """Send a query to Merriam-Webster's API."""
-    # Check if cached
-    if cache_record := cache.get_row(con, query.query_url):
-        json_response = json.loads(cache_record.response_text)
-    else:
-        response = client.get(query.query_url).raise_for_status()
-        json_response = response.json()
-
-    # Insert into cache if pulled from API
-    if not cache_record:
-        cache.insert_row(con, query, json.dumps(json_response))
+    """Parse a raw response body into items to display.
+
+    A response without results is parsed into its alternate search terms.
+    """
+    return parse_json(query, decode_response(raw_response))
+
+
+def decode_response(raw_response: bytes) -> Any:
+    """Decode a raw response body, raising `ValueError` if it is not JSON."""
+    with stage("json"):
+        return json.loads(raw_response)
 
+
+def parse_json(
+    query: MerriamWebsterQuery, json_response: Any
+) -> list[MerriamWebsterItem]:
+    """Parse a decoded response body into items to display, as `parse_response`."""
     data: list[MerriamWebsterItem] = []
 
     # No result, or list of alternate search terms
     if not json_response or isinstance(json_response[0], str):
         json_response: list[str]  # type: ignore [no-redef]
 
-        message = (
-            "No results found for the searched term. Perhaps you meant one of "
-            "the following?"
-        )
-
-        console.print(Text(message, style="italic red"))
-
         for index, item in enumerate(json_response):
             data.append(InvalidSearch.from_json(item, index))
 
@@ -75,8 +218,9 @@ def process_query(
         case "dictionary":
             json_response: CollegiateResponse  # type: ignore [no-redef]
 
-            for index, item in enumerate(json_response):
-                data.append(Collegiate.from_json(item, index))
+            with stage("parse"):
+                for index, item in enumerate(json_response):
+                    data.append(Collegiate.from_json(item, index))
 
         # case "thesaurus":
         #     json_response: ThesaurusResponse
@@ -1,33 +1,53 @@
 from __future__ import annotations
 
-import sqlite3
 from typing import TYPE_CHECKING, Literal
 
-import httpx
-
 from dicc import cache
-from dicc.query.common import create_query, process_query
+from dicc.profile import stage
+from dicc.query.common import (
+    create_query,
+    fetch_responses,
+    resolve_responses,
+    try_fetch_response,
+)
+from dicc.query.render import render_responses
 
 if TYPE_CHECKING:
-    from dicc.responses.abstract import MerriamWebsterItem
+    from collections.abc import Iterator, Sequence
 
+    from dicc.display.plain import OutputFormat
+    from dicc.query.common import Fetched, MerriamWebsterQuery
 
-def search_word(
-    word: str, method: Literal["dictionary", "thesaurus"]
-) -> list[MerriamWebsterItem]:
-    """Search for a word."""
-    db = cache.create_cache_path(cache.CACHE_PATH)
-    con = sqlite3.connect(db)
-    client = httpx.Client()
 
-    query_ = create_query(word, method)
+def search_rendered(
+    words: Sequence[str],
+    method: Literal["dictionary", "thesaurus"],
+    concurrency: int,
+    exact: bool = False,
+    output_format: OutputFormat = "rich",
+) -> Iterator[str]:
+    """Search for words, and yield the results rendered in `output_format`.
 
-    try:
-        result = process_query(query_, con, client)
-    except sqlite3.OperationalError:
-        cache.create_database(con)
-        result = process_query(query_, con, client)
+    One word is fetched with the shared client, and many concurrently. Results
+    are yielded in the order of `words`, with an error for words that failed.
+    """
+    with stage("cache"):
+        con = cache.connect()
+
+    queries = [create_query(word, method) for word in words]
+
+    def fetch(misses: list[MerriamWebsterQuery]) -> list[Fetched]:
+        import asyncio
 
-    con.close()
+        from dicc.query.client import get_client
 
-    return result
+        if len(misses) == 1:
+            return [try_fetch_response(misses[0], get_client())]
+
+        return asyncio.run(fetch_responses(misses, concurrency))
+
+    try:
+        responses = resolve_responses(queries, con, fetch, exact)
+        yield from render_responses(con, queries, responses, output_format)
+    finally:
+        con.close()
@@ -0,0 +1,136 @@
+"""Render search results for the terminal.
+
+With `rendered` set in the cache configuration, rendered output is cached by the
+searched word, the console width and color system, and the style configuration.
+A repeat search with the same settings then skips parsing, formatting and layout.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import TYPE_CHECKING
+
+from dicc import cache
+from dicc.config.main import get_config
+from dicc.display.plain import FORMATTERS
+from dicc.display.search import format_search
+from dicc.hot_cache import HotEntry
+from dicc.profile import stage
+from dicc.query.common import parse_response
+from dicc.terminal import console
+
+if TYPE_CHECKING:
+    import sqlite3
+    from collections.abc import Iterator, Mapping, Sequence
+
+    import httpx
+
+    from dicc.display.plain import OutputFormat
+    from dicc.query.common import MerriamWebsterQuery, Resolved
+    from dicc.responses.abstract import MerriamWebsterItem
+
+RENDER_VERSION = 1  # Bump when rendering changes, so earlier output is not used
+
+
+def style_hash() -> str:
+    """Return a digest of the style configuration, and of the rendering version."""
+    data = json.dumps([RENDER_VERSION, get_config().style], sort_keys=True)
+
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+def _items(
+    query: MerriamWebsterQuery, response: bytes | HotEntry
+) -> list[MerriamWebsterItem]:
+    """Return the items of a response, parsing it unless parsed already."""
+    if isinstance(response, bytes):
+        return parse_response(query, response)
+
+    return response.items
+
+
+def render_response(query: MerriamWebsterQuery, response: bytes | HotEntry) -> str:
+    """Render the results of a query, as written to the terminal."""
+    with stage("render"), console.capture() as capture:
+        console.print(format_search(query.word, _items(query, response)))
+
+    return capture.get()
+
+
+def render_error(
+    query: MerriamWebsterQuery, error: httpx.HTTPError, output_format: OutputFormat
+) -> str:
+    """Render a word that failed to fetch, in place of its results."""
+    if output_format == "json":  # As written by `dicc stream`
+        return json.dumps({"word": query.word, "error": str(error)}) + "\n"
+
+    message = f"Could not look up {query.word}: {error}"
+
+    if output_format != "rich":
+        return message + "\n\n"
+
+    with console.capture() as capture:
+        console.print(message, style="red", markup=False, highlight=False)
+
+    return capture.get()
+
+
+def render_responses(
+    con: sqlite3.Connection,
+    queries: Sequence[MerriamWebsterQuery],
+    responses: Mapping[str, Resolved],
+    output_format: OutputFormat = "rich",
+) -> Iterator[str]:
+    """Yield the rendered results of each query, in order.
+
+    `responses` holds the raw or parsed response for each query, or the error
+    fetching it, by cache key. Formats other than "rich" are cheap to produce, so
+    they are never cached.
+    """
+    rendered = output_format == "rich" and get_config().cache.get("rendered", False)
+    digest = style_hash() if rendered else ""
+
+    for query in queries:
+        response = responses[query.cache_key]
+
+        if not isinstance(response, (bytes, HotEntry)):
+            yield render_error(query, response, output_format)
+        elif output_format != "rich":
+            with stage("render"):
+                result = _items(query, response)
+                yield FORMATTERS[output_format](query.word, result)
+        elif not rendered:
+            yield render_response(query, response)
+        else:
+            yield _cached_render(con, query, response, digest)
+
+
+def _cached_render(
+    con: sqlite3.Connection,
+    query: MerriamWebsterQuery,
+    response: bytes | HotEntry,
+    digest: str,
+) -> str:
+    """Return the rendered results of a query, from the cache if rendered before."""
+    key = cache.RenderKey(
+        query.cache_key,
+        query.word,
+        console.width,
+        console.color_system or "",
+        digest,
+    )
+    if isinstance(response, bytes):
+        response_hash = cache.response_hash(response)
+    else:
+        response_hash = response.response_hash
+
+    with stage("cache"):
+        output = cache.get_rendered(con, key, response_hash)
+
+    if output is None:
+        output = render_response(query, response)
+
+        with stage("cache"):
+            cache.insert_rendered(con, key, response_hash, output)
+
+    return output
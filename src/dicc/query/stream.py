@@ -0,0 +1,162 @@
+"""Look up a stream of words, writing one line of JSON for each.
+
+Words are read on a background thread, so a result is written as soon as it is
+ready, even while waiting for more input. At most `concurrency` words are read
+but not yet written, which bounds memory for any length of input, and stops
+reading while the output is not consumed.
+"""
+from __future__ import annotations
+
+import json
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Literal, NamedTuple
+
+import httpx
+
+from dicc import cache
+from dicc.display.plain import format_json
+from dicc.hot_cache import HotCache, HotEntry
+from dicc.query.client import get_client
+from dicc.query.common import create_query, fetch_response, parse_response
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from dicc.query.common import MerriamWebsterQuery
+    from dicc.url import QueryMethod
+
+_Event = tuple[Literal["word", "done", "end"], str]
+
+FLUSH_ROWS = 100  # Rows accessed in memory before their accesses are written
+
+
+class _Lookup(NamedTuple):
+    """A word being looked up. Cache hits are already done, and parsed."""
+
+    query: MerriamWebsterQuery
+    response: Future[bytes] | Future[HotEntry]
+
+
+def stream_search(
+    lines: Iterable[str],
+    method: QueryMethod,
+    concurrency: int,
+    ordered: bool = True,
+    exact: bool = False,
+) -> Iterator[str]:
+    """Look up each word in `lines`, and yield one line of JSON for each.
+
+    Lines are yielded in input order if `ordered`, else as each word is ready.
+    Words that fail to fetch yield a line with an "error" instead of entries.
+    """
+    events: queue.SimpleQueue[_Event] = queue.SimpleQueue()
+    slots = threading.Semaphore(concurrency)  # Words read, but not yet written
+
+    def read() -> None:
+        try:
+            for line in lines:
+                if word := line.strip():
+                    slots.acquire()
+                    events.put(("word", word))
+        finally:
+            events.put(("end", ""))
+
+    con = cache.connect()
+    hot = HotCache()  # Repeated words are answered from memory
+
+    client = get_client()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    pending: deque[_Lookup] = deque()  # In input order
+    in_flight: dict[str, Future[bytes]] = {}  # Fetches not yet cached, by key
+
+    def start(word: str) -> _Lookup:
+        query = create_query(word, method)
+
+        try:
+            entry = hot.get_entry(con, query.cache_key, stems=not exact)
+        except ValueError as error:  # Cached, but not JSON
+            failed: Future[HotEntry] = Future()
+            failed.set_exception(error)
+            return _Lookup(query, failed)
+
+        if entry is not None:
+            hit: Future[HotEntry] = Future()
+            hit.set_result(entry)
+            return _Lookup(query, hit)
+
+        if (future := in_flight.get(query.cache_key)) is None:
+            future = executor.submit(fetch_response, query, client)
+            future.add_done_callback(lambda _: events.put(("done", "")))
+            in_flight[query.cache_key] = future
+
+        return _Lookup(query, future)
+
+    def finish(lookup: _Lookup) -> str:
+        query = lookup.query
+
+        # Duplicate words share one fetch, cached by the first to finish
+        fetched = in_flight.get(query.cache_key) is lookup.response
+        if fetched:
+            del in_flight[query.cache_key]
+
+        try:
+            try:
+                response = lookup.response.result()
+            except httpx.HTTPStatusError:
+                if fetched:  # Sent, and counted by the API
+                    cache.record_api_usage(con, query.method)
+                raise
+
+            if fetched and isinstance(response, bytes):
+                cache.record_api_usage(con, query.method)
+                response = hot.insert_row(con, query, response)
+
+            if isinstance(response, bytes):  # Fetched for a duplicate word
+                return format_json(query.word, parse_response(query, response))
+
+            return format_json(query.word, response.items)
+        except (httpx.HTTPError, ValueError) as error:  # Unreachable, or not JSON
+            return json.dumps({"word": query.word, "error": str(error)}) + "\n"
+
+    def ready() -> list[_Lookup]:
+        done: list[_Lookup] = []
+
+        if ordered:
+            while pending and pending[0].response.done():
+                done.append(pending.popleft())
+            return done
+
+        waiting: list[_Lookup] = []
+        for lookup in pending:  # One pass, as fetches finish meanwhile
+            (done if lookup.response.done() else waiting).append(lookup)
+
+        pending.clear()
+        pending.extend(waiting)
+        return done
+
+    threading.Thread(target=read, daemon=True).start()
+    reading = True
+
+    try:
+        while reading or pending:
+            kind, word = events.get()
+
+            if kind == "word":
+                pending.append(start(word))
+            elif kind == "end":
+                reading = False
+
+            for lookup in ready():
+                yield finish(lookup)
+                slots.release()
+
+            if hot.unwritten >= FLUSH_ROWS:
+                hot.flush(con)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        hot.flush(con)
+        con.close()
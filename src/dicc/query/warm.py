@@ -0,0 +1,165 @@
+"""Fill the cache ahead of time, from a list of words.
+
+Words already cached are skipped, and no more requests are sent than the daily
+quota has left, so an interrupted or partial warm is finished by running it again.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, NamedTuple
+
+import httpx
+
+from dicc import cache
+from dicc.config.main import get_config
+from dicc.query.client import get_client
+from dicc.query.common import create_query, fetch_response
+
+if TYPE_CHECKING:
+    import sqlite3
+    from collections.abc import Generator, Iterable
+    from typing import Optional
+
+    from dicc.query.common import MerriamWebsterQuery
+    from dicc.url import QueryMethod
+
+# Merriam-Webster's free tier, for each API key
+DEFAULT_DAILY_QUOTA = 1000
+DEFAULT_REQUESTS_PER_SECOND = 5.0
+
+
+class WarmPlan(NamedTuple):
+    """The words of a word list to fetch, and those left out."""
+
+    queries: list[MerriamWebsterQuery]  # Within today's quota
+    cached: int
+    deferred: int  # Over today's quota
+
+
+class Warmed(NamedTuple):
+    """A word fetched while warming, or the error fetching it."""
+
+    query: MerriamWebsterQuery
+    error: Optional[Exception] = None
+
+
+class RateLimiter:
+    """Space out calls from any number of threads, to at most `rate` per second.
+
+    A `rate` of zero does not limit calls.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self._interval = 1 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until the next call is allowed."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self._interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def daily_quota() -> int:
+    """Return the configured daily quota of requests for each search method."""
+    return get_config().http.get("daily_quota", DEFAULT_DAILY_QUOTA)
+
+
+def requests_per_second() -> float:
+    """Return the configured most requests sent to the API each second."""
+    return get_config().http.get("requests_per_second", DEFAULT_REQUESTS_PER_SECOND)
+
+
+def plan_warm(
+    con: sqlite3.Connection,
+    words: Iterable[str],
+    method: QueryMethod,
+    quota: int,
+    exact: bool = False,
+) -> WarmPlan:
+    """Return the words to fetch, in order, skipping duplicates and cached words.
+
+    Words are fetched while `quota` has requests left today. Unless `exact`, words
+    cached as stems of other words are skipped.
+    """
+    unique: dict[str, MerriamWebsterQuery] = {}
+    for word in words:
+        query = create_query(word, method)
+        unique.setdefault(query.cache_key, query)
+
+    queries = list(unique.values())
+    cached = cache.cached_keys(con, list(unique), stems=not exact)
+
+    misses = [query for query in queries if query.cache_key not in cached]
+    remaining = max(quota - cache.get_api_usage(con, method), 0)
+    deferred = len(misses[remaining:])
+
+    return WarmPlan(misses[:remaining], len(queries) - len(misses), deferred)
+
+
+def warm(
+    con: sqlite3.Connection,
+    queries: Iterable[MerriamWebsterQuery],
+    concurrency: int,
+    rate: float,
+    batch_size: int = 100,
+) -> Generator[Warmed, None, None]:
+    """Fetch and cache each query, yielding each as it finishes.
+
+    At most `concurrency` requests are in flight at once, and at most `rate` start
+    each second. Responses are cached in batches of `batch_size`, and whatever was
+    fetched is cached when stopped early. Failed words are not cached, so warming
+    again retries them.
+    """
+    client = get_client()
+    limiter = RateLimiter(rate)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def fetch(query: MerriamWebsterQuery) -> bytes:
+        limiter.wait()
+        return fetch_response(query, client)
+
+    batch: list[tuple[MerriamWebsterQuery, bytes]] = []
+    requests: Counter[str] = Counter()  # Sent, not yet counted against the quota
+
+    def flush() -> None:
+        if batch:
+            cache.insert_rows(con, batch)
+            batch.clear()
+
+        for method, count in requests.items():
+            cache.record_api_usage(con, method, count)
+        requests.clear()
+
+    futures = {executor.submit(fetch, query): query for query in queries}
+
+    try:
+        for future in as_completed(futures):
+            query = futures[future]
+
+            try:
+                batch.append((query, future.result()))
+                requests[query.method] += 1
+            except httpx.HTTPStatusError as error:  # Sent, and counted by the API
+                requests[query.method] += 1
+                yield Warmed(query, error)
+                continue
+            except httpx.HTTPError as error:  # Unreachable
+                yield Warmed(query, error)
+                continue
+
+            if len(batch) >= batch_size:
+                flush()
+
+            yield Warmed(query)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        flush()
@@ -0,0 +1,66 @@
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+
+import httpx
+import pytest
+
+from dicc import cache
+from dicc.config import main
+from dicc.query import stream, warm
+from dicc.query.common import MerriamWebsterQuery
+
+# Seconds the stub takes to fetch a word, if not the default
+FETCH_DELAYS = {"slow": 0.2, "fast": 0.0}
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Keep tests out of the user's home, configuration and cache."""
+    home = tmp_path / "home"
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setattr(main, "USER_CONFIG_LOCATIONS", [])
+    monkeypatch.setattr(main, "SNAPSHOT_PATH", home / ".cache/dicc/config.pickle")
+    monkeypatch.setattr(main, "_config", None)  # Loaded again, from the defaults
+    monkeypatch.setattr(cache, "CACHE_PATH", home / ".cache/dicc")
+
+
+@pytest.fixture
+def con() -> Iterator[sqlite3.Connection]:
+    """Open an empty cache database, in memory."""
+    con = sqlite3.connect(":memory:")
+    cache.create_database(con)
+    yield con
+    con.close()
+
+
+@pytest.fixture
+def fetches(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Fetch from a stub, into an empty cache, and record each word fetched.
+
+    The stub suggests the word with an "s" appended. It fails for "missing",
+    and the API refuses "forbidden".
+    """
+    monkeypatch.setattr(cache, "CACHE_PATH", tmp_path)
+    fetched: list[str] = []
+    lock = threading.Lock()
+
+    def fetch_response(query: MerriamWebsterQuery, client: httpx.Client) -> bytes:
+        with lock:
+            fetched.append(query.word)
+        if query.word == "missing":
+            raise httpx.ConnectError("Unreachable")
+        if query.word == "forbidden":
+            request = httpx.Request("GET", "https://example.com")
+            response = httpx.Response(403, request=request)
+            raise httpx.HTTPStatusError("Forbidden", request=request, response=response)
+
+        time.sleep(FETCH_DELAYS.get(query.word, 0.05))
+        return json.dumps([f"{query.word}s"]).encode()
+
+    monkeypatch.setattr(stream, "fetch_response", fetch_response)
+    monkeypatch.setattr(warm, "fetch_response", fetch_response)
+    return fetched
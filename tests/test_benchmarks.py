@@ -0,0 +1,79 @@
+import json
+import pathlib
+
+from benchmarks import corpus, harness, startup
+from benchmarks.__main__ import benchmarks, main
+from dicc import cache
+from dicc.query.common import create_query
+
+
+def test_synthetic_corpus() -> None:
+    assert corpus.synthetic_corpus(3, seed=1) == corpus.synthetic_corpus(3, seed=1)
+
+    results = [
+        harness.run(benchmark, rounds=1, warmup=0)
+        for benchmark in benchmarks("synthetic", corpus.synthetic_corpus(3), [40])
+    ]
+    assert all(result.throughput > 0 for result in results)
+
+
+def test_recorded_corpus(tmp_path: pathlib.Path) -> None:
+    recorded = corpus.recorded_corpus()
+    assert ["bear:1", "bear:2", "colour"] == [
+        entry["meta"]["id"] for entry in recorded[:3]
+    ]
+
+    results = [
+        harness.run(benchmark, rounds=1, warmup=0)
+        for benchmark in benchmarks("recorded", recorded, [40])
+    ]
+    assert all(result.throughput > 0 for result in results)
+
+    con = cache.connect(tmp_path / "dicc.db")
+    cache.insert_row(con, create_query("Run", "dictionary"), b'["rune"]')
+    con.close()
+
+    missing = corpus.record_responses(tmp_path / "dicc.db", ["Run", "walk"], tmp_path)
+    assert ["walk"] == missing
+    assert [] == corpus.recorded_corpus(tmp_path)  # Only alternate terms
+    assert ["rune"] == json.loads((tmp_path / "run.json").read_text())
+
+
+def test_compare() -> None:
+    result = harness.Result("format_text", [1000, 2000, 3000])
+    baseline = {"format_text": {"p50": 1.0}, "missing": {"p50": 1.0}}
+
+    (regression,) = harness.compare([result], baseline, threshold=0.5)
+    assert "format_text" == regression.name
+    assert 2.0 == regression.current
+    assert [] == harness.compare([result], baseline, threshold=1.5)
+
+
+def test_baseline(tmp_path: pathlib.Path) -> None:
+    baseline = tmp_path / "baseline.json"
+    arguments = ["--corpus", "synthetic", "--entries", "2", "--rounds", "1"]
+
+    assert 0 == main([*arguments, "--widths", "40", "--save", str(baseline)])
+    assert {"synthetic/format_text", "synthetic/render@40"} <= set(
+        harness.load_baseline(baseline)
+    )
+    comparison = ["--filter", "from_json", "--compare", str(baseline)]
+    assert 0 == main([*arguments, *comparison, "--threshold", "100"])
+
+
+def test_startup() -> None:
+    arguments = ["--filter", "cache stats", "--rounds", "2"]
+
+    assert 0 == startup.main([*arguments, "--scale", "100"])
+    assert 1 == startup.main([*arguments, "--scale", "0"])
+
+
+def test_prepare_home(tmp_path: pathlib.Path) -> None:
+    from dicc.config import main as config
+
+    snapshot_path = config.SNAPSHOT_PATH
+    startup.prepare_home(tmp_path)
+
+    # The configuration was read as the commands will, and left as it was
+    assert (tmp_path / ".cache" / "dicc" / "config.pickle").exists()
+    assert snapshot_path == config.SNAPSHOT_PATH
@@ -0,0 +1,344 @@
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import pathlib
+import sqlite3
+
+from dicc import cache
+from dicc.query.common import MerriamWebsterQuery
+
+
+def _query(word: str, timestamp: datetime.datetime) -> MerriamWebsterQuery:
+    key = cache.cache_key(word, "dictionary")
+    return MerriamWebsterQuery(word, timestamp, "dictionary", key)
+
+
+def test_cache_key() -> None:
+    assert "collegiate/ice cream" == cache.cache_key(" Ice  Cream ", "dictionary")
+    assert "thesaurus/run" == cache.cache_key("RUN", "thesaurus")
+
+
+def test_months_ago() -> None:
+    now = datetime.datetime(2024, 3, 31, 12, 0)
+
+    assert datetime.datetime(2024, 2, 29, 12, 0) == cache._months_ago(now, 1)
+    assert datetime.datetime(2023, 3, 31, 12, 0) == cache._months_ago(now, 12)
+    assert datetime.datetime(2021, 12, 31, 12, 0) == cache._months_ago(now, 27)
+
+
+def test_total_size(con: sqlite3.Connection) -> None:
+    now = datetime.datetime.now()
+
+    one = cache.insert_row(con, _query("one", now), b"x" * 10)
+    two = cache.insert_row(con, _query("two", now), b"y" * 20)
+    assert len(cache.compress(b"x" * 10)) == one.size
+    assert one.size + two.size == cache.get_stats(con).total_size
+
+    cache.delete_row(con, _query("one", now).cache_key)
+    assert two.size == cache.get_stats(con).total_size
+
+    cache.clear_cache(con)
+    assert 0 == cache.get_stats(con).total_size
+
+
+def test_evict_least_recently_used(con: sqlite3.Connection) -> None:
+    now = datetime.datetime.now()
+    response = os.urandom(400 * 1024).hex().encode()  # Two fit in 1 MB, compressed
+
+    for minutes, word in enumerate(["one", "two", "three"]):
+        timestamp = now - datetime.timedelta(minutes=10 - minutes)
+        cache.insert_row(con, _query(word, timestamp), response)
+
+    # "one" is the oldest, but was used most recently
+    assert cache.get_row(con, _query("one", now).cache_key)
+
+    assert 1 == cache.evict(con, max_size=1, max_age=12)
+    assert cache.get_row(con, _query("one", now).cache_key)
+    assert not cache.get_row(con, _query("two", now).cache_key)
+    assert cache.get_row(con, _query("three", now).cache_key)
+
+
+def test_evict_max_age(con: sqlite3.Connection) -> None:
+    now = datetime.datetime.now()
+    old = now - datetime.timedelta(days=400)
+
+    cache.insert_row(con, _query("new", now), b"{}")
+    cache.insert_row(con, _query("old", old), b"{}")  # Evicted on insert
+
+    assert 1 == cache.get_stats(con).entries
+    assert not cache.get_row(con, _query("old", now).cache_key)
+    assert cache.get_row(con, _query("new", now).cache_key)
+
+    assert 1 == cache.evict(con, max_size=10, max_age=0)
+    assert 0 == cache.get_stats(con).entries
+
+
+def test_migrate_original_schema() -> None:
+    con = sqlite3.connect(":memory:")
+    cache._create_queries(con)
+    con.execute(
+        "INSERT INTO queries VALUES (?, ?, ?, ?, ?)",
+        ("Word", "2024-01-01T00:00:00", "dictionary", "https://a/?key=1", "[1]"),
+    )
+    con.execute(
+        "INSERT INTO queries VALUES (?, ?, ?, ?, ?)",
+        ("word", "2024-02-01T00:00:00", "dictionary", "https://a/?key=2", "[]"),
+    )
+
+    cache.create_database(con)
+
+    # Merged by key, keeping the newest response
+    (row,) = cache.get_cache(con) or []
+    assert "collegiate/word" == row.cache_key
+    assert b"[]" == row.response
+    assert "2024-02-01T00:00:00" == row.accessed_timestamp
+    assert len(cache.compress(b"[]")) == row.size
+    assert row.size == cache.get_stats(con).total_size
+
+
+def test_compress() -> None:
+    data = b'[{"meta": {"id": "word"}}]' * 10
+
+    codecs: tuple[cache.Codec, ...] = ("identity", "zlib")
+    for codec in codecs:
+        assert data == cache.decompress(cache.compress(data, codec), codec)
+
+    assert len(cache.compress(data)) < len(data)
+
+
+def test_get_rows(con: sqlite3.Connection) -> None:
+    now = datetime.datetime.now()
+    queries = [_query(word, now) for word in ("one", "two", "three")]
+
+    cache.insert_rows(con, [(query, query.word.encode()) for query in queries])
+
+    keys = [queries[2].cache_key, "collegiate/missing", queries[0].cache_key]
+    rows = cache.get_rows(con, keys)
+
+    assert {queries[2].cache_key, queries[0].cache_key} == set(rows)
+    assert b"three" == rows[queries[2].cache_key].response
+
+
+_RUN = json.dumps(
+    [
+        {"meta": {"id": "run:1", "stems": ["run", "ran", "running"]}},
+        {"meta": {"id": "run across", "stems": ["run across", "ran across"]}},
+    ]
+).encode()
+
+
+def test_entry_stems() -> None:
+    assert {"run", "ran", "running"} == cache.entry_stems("Run", _RUN)
+    assert set() == cache.entry_stems("run", b'["suggestion"]')
+    assert set() == cache.entry_stems("run", b"not json")
+
+
+def test_get_row_by_stem(con: sqlite3.Connection) -> None:
+    now = datetime.datetime.now()
+    cache.insert_row(con, _query("run", now), _RUN)
+
+    running = _query("running", now).cache_key
+    row = cache.get_row(con, running)
+    assert row is not None
+    assert _RUN == row.response
+    assert {running} == set(cache.get_rows(con, [running]))
+
+    assert cache.get_row(con, running, stems=False) is None
+    assert cache.get_row(con, _query("ran across", now).cache_key) is None
+
+    cache.delete_row(con, _query("run", now).cache_key)
+    assert 0 == con.execute("SELECT COUNT(*) FROM stems").fetchone()[0]
+
+
+def test_migrate_stems() -> None:
+    now = datetime.datetime.now().isoformat()
+    con = sqlite3.connect(":memory:")
+    version = cache._MIGRATIONS.index(cache._index_stems)
+    for migration in cache._MIGRATIONS[:version]:
+        migration(con)
+    con.execute(
+        "INSERT INTO queries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            "run",
+            now,
+            "dictionary",
+            "collegiate/run",
+            cache.compress(_RUN),
+            now,
+            len(cache.compress(_RUN)),
+            cache.CODEC,
+        ),
+    )
+    con.execute(f"PRAGMA user_version = {version}")
+
+    cache.create_database(con)
+
+    assert cache.get_row(con, "collegiate/ran") is not None
+
+
+def test_rendered(con: sqlite3.Connection) -> None:
+    now = datetime.datetime.now()
+    cache.insert_row(con, _query("run", now), _RUN)
+
+    response_hash = cache.response_hash(_RUN)
+    key = cache.RenderKey("collegiate/run", "Run", 80, "truecolor", "style")
+    stem_key = key._replace(cache_key="collegiate/ran", word="ran")
+
+    cache.insert_rendered(con, key, response_hash, "\x1b[1mrun\x1b[0m")
+    cache.insert_rendered(con, stem_key, response_hash, "ran")
+
+    assert "\x1b[1mrun\x1b[0m" == cache.get_rendered(con, key, response_hash)
+    assert cache.get_rendered(con, key._replace(width=60), response_hash) is None
+    assert cache.get_rendered(con, key, cache.response_hash(b"[]")) is None
+
+    # Removed with the response, and the stems, they were rendered from
+    cache.delete_row(con, "collegiate/run")
+    assert 0 == con.execute("SELECT COUNT(*) FROM rendered").fetchone()[0]
+
+
+def test_rendered_size(con: sqlite3.Connection) -> None:
+    now = datetime.datetime.now()
+    one = cache.insert_row(con, _query("one", now - datetime.timedelta(minutes=1)), _RUN)
+    two = cache.insert_row(con, _query("two", now), _RUN)
+
+    key = cache.RenderKey(one.cache_key, "one", 80, "truecolor", "style")
+    cache.insert_rendered(con, key, cache.response_hash(_RUN), "small")
+    output = os.urandom(1200 * 1024).hex()  # Over 1 MB, compressed
+    cache.insert_rendered(con, key, cache.response_hash(_RUN), output)
+
+    (rendered,) = con.execute("SELECT size FROM rendered").fetchone()
+    assert one.size + two.size + rendered == cache.get_stats(con).total_size
+
+    # Evicting the output rendered from "one" is enough to fit
+    assert 1 == cache.evict(con, max_size=1, max_age=12)
+    assert cache.get_row(con, two.cache_key)
+    assert two.size == cache.get_stats(con).total_size
+
+
+def test_cached_keys(con: sqlite3.Connection) -> None:
+    now = datetime.datetime.now()
+    cache.insert_row(con, _query("run", now), _RUN)
+
+    keys = [_query(word, now).cache_key for word in ["run", "ran", "walk"]]
+    assert {keys[0], keys[1]} == cache.cached_keys(con, keys)
+    assert {keys[0]} == cache.cached_keys(con, keys, stems=False)
+
+
+def test_api_usage(con: sqlite3.Connection) -> None:
+    yesterday = datetime.date.today() - datetime.timedelta(days=1)
+
+    cache.record_api_usage(con, "dictionary", 2)
+    cache.record_api_usage(con, "dictionary")
+    cache.record_api_usage(con, "dictionary", 5, day=yesterday)
+
+    assert 3 == cache.get_api_usage(con, "dictionary")
+    assert 5 == cache.get_api_usage(con, "dictionary", yesterday)
+    assert 0 == cache.get_api_usage(con, "thesaurus")
+
+
+def test_export_import(con: sqlite3.Connection) -> None:
+    now = datetime.datetime.now()
+    old = now - datetime.timedelta(days=1)
+    cache.insert_row(con, _query("run", now), _RUN)
+    cache.insert_row(con, _query("walk", old), b'["old walk"]')
+
+    file = io.StringIO()
+    assert 2 == cache.export_cache(con, file)
+
+    other = sqlite3.connect(":memory:")
+    cache.create_database(other)
+    cache.insert_row(other, _query("run", old), b"[]")  # Replaced, as older
+    cache.insert_row(other, _query("walk", now), b'["new walk"]')
+
+    file.seek(0)
+    assert 1 == cache.import_cache(other, file, batch_size=1)
+
+    ran = cache.get_row(other, _query("ran", now).cache_key)
+    assert ran is not None
+    assert _RUN == ran.response
+
+    walk = cache.get_row(other, "collegiate/walk")
+    assert walk is not None
+    assert b'["new walk"]' == walk.response
+
+
+def test_cached_words(con: sqlite3.Connection) -> None:
+    now = datetime.datetime.now()
+    for minutes, word in enumerate(["b", "c", "a"]):
+        timestamp = now - datetime.timedelta(minutes=minutes)
+        cache.insert_row(con, _query(word, timestamp), b"[]")
+    thesaurus = cache.cache_key("d", "thesaurus")
+    cache.insert_row(con, MerriamWebsterQuery("d", now, "thesaurus", thesaurus), b"[]")
+
+    assert ["a", "b", "c", "d"] == list(cache.cached_words(con))
+    assert ["b", "c"] == list(cache.cached_words(con, "age", "dictionary", 2))
+    assert ["c"] == list(cache.cached_words(con, method="dictionary", offset=2))
+
+
+def test_hit_count(tmp_path: pathlib.Path) -> None:
+    db = tmp_path / "dicc.db"
+    old = sqlite3.connect(db)
+    with old:
+        for number, migration in enumerate(cache._MIGRATIONS[:-1], start=1):
+            migration(old)
+            old.execute(f"PRAGMA user_version = {number}")
+    now = datetime.datetime.now()
+    cache.insert_row(old, _query("run", now), _RUN)
+    cache.insert_row(old, _query("walk", now), b"[]")
+    old.close()
+
+    # Migrated in place when opened
+    con = cache.connect(db)
+    assert 0 == cache.get_stats(con).hits
+
+    cache.get_row(con, "collegiate/run")
+    cache.get_row(con, "collegiate/ran")  # By stem
+    cache.get_row(con, "collegiate/walk")
+
+    stats = cache.get_stats(con)
+    assert 2 == stats.entries
+    assert 3 == stats.hits
+    assert len(cache._MIGRATIONS) == stats.schema_version
+    assert ["run", "walk"] == list(cache.cached_words(con, "hits"))
+    con.close()
+
+
+def _hammer(db: pathlib.Path, worker: int, words: int) -> int:
+    """Cache words of its own and words shared by every worker, reading each back."""
+    con = cache.connect(db)
+    found = 0
+
+    try:
+        for number in range(words):
+            now = datetime.datetime.now()
+            for word in (f"own {worker} {number}", f"shared {number}"):
+                query = _query(word, now)
+                cache.insert_row(con, query, _RUN)
+                found += cache.get_row(con, query.cache_key) is not None
+            cache.record_api_usage(con, "dictionary")
+    finally:
+        con.close()
+
+    return found
+
+
+def test_concurrent_processes(tmp_path: pathlib.Path) -> None:
+    db = tmp_path / "dicc.db"
+    workers, words = 4, 25
+
+    # Each opens the cache, so the first also creates it while others wait
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        arguments = [(db, worker, words) for worker in range(workers)]
+        found = pool.starmap(_hammer, arguments)
+
+    assert [words * 2] * workers == found
+
+    con = cache.connect(db)
+    assert "wal" == con.execute("PRAGMA journal_mode").fetchone()[0]
+    assert words * (workers + 1) == cache.get_stats(con).entries
+    (size,) = con.execute("SELECT SUM(size) FROM queries").fetchone()
+    assert size == cache.get_stats(con).total_size
+    assert words * workers == cache.get_api_usage(con, "dictionary")
+    con.close()
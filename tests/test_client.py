@@ -0,0 +1,34 @@
+import pytest
+
+from dicc.config.main import get_config
+from dicc.query import client
+
+
+def test_shared_client() -> None:
+    shared = client.get_client()
+
+    assert shared is client.get_client()
+
+    client.close_client()
+    assert shared.is_closed
+    assert shared is not client.get_client()
+
+    client.close_client()
+
+
+def test_client_options() -> None:
+    options = client.client_options()
+
+    http = get_config().http
+    assert options["limits"].max_connections == http.get("max_connections")
+    assert options["timeout"].connect == http.get("connect_timeout")
+
+
+def test_client_options_partial(monkeypatch: pytest.MonkeyPatch) -> None:
+    # A user table replaces the default one, with only the keys it sets
+    monkeypatch.setattr(get_config(), "http", {"timeout": 2.0})
+    options = client.client_options()
+
+    assert 2.0 == options["timeout"].read
+    assert client.DEFAULT_CONNECT_TIMEOUT == options["timeout"].connect
+    assert client.DEFAULT_MAX_CONNECTIONS == options["limits"].max_connections
@@ -0,0 +1,44 @@
+import pathlib
+
+import pytest
+from rich.style import Style
+
+from dicc.config import main
+
+
+@pytest.fixture
+def user_file(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> pathlib.Path:
+    """Read the user configuration from one file, not created yet."""
+    path = tmp_path / "dicc.toml"
+    monkeypatch.setattr(main, "USER_CONFIG_LOCATIONS", [path])
+    return path
+
+
+def test_parsed_style(user_file: pathlib.Path) -> None:
+    config = main.Configuration.load()
+    bold = config.style["tags"]["bold"]
+
+    assert config.parsed_style(bold) is config.styles[bold]
+    assert Style(italic=True) == config.parsed_style("italic")
+
+
+def test_snapshot(
+    tmp_path: pathlib.Path, user_file: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    snapshot = tmp_path / "config.pickle"
+    loaded = main.load_snapshot(snapshot)
+    assert snapshot.exists()
+
+    def fail() -> None:
+        raise AssertionError("Loaded from the files")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(main.Configuration, "load", fail)
+        assert loaded == main.load_snapshot(snapshot)
+
+    # Creating a user file changes the configuration
+    user_file.write_text("[cache]\nmax_size = 1\nmax_age = 1\n", encoding="utf-8")
+    assert 1 == main.load_snapshot(snapshot).cache["max_size"]
+
+    snapshot.write_bytes(b"not a pickle")
+    assert 1 == main.load_snapshot(snapshot).cache["max_size"]
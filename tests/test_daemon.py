@@ -0,0 +1,51 @@
+import json
+import pathlib
+import threading
+
+from dicc import cache
+from dicc.daemon import client
+from dicc.daemon.server import Daemon, DaemonServer
+from dicc.query.common import create_query
+
+RESPONSE = json.dumps(
+    [
+        {
+            "meta": {"id": "test", "stems": ["test"]},
+            "hwi": {"hw": "test"},
+            "shortdef": ["a trial"],
+        }
+    ]
+).encode()
+
+
+def test_no_daemon(tmp_path: pathlib.Path) -> None:
+    socket_path = tmp_path / "none.sock"
+    assert client.search(["test"], "dictionary", 1, 80, socket_path=socket_path) is None
+
+
+def test_search(tmp_path: pathlib.Path) -> None:
+    daemon = Daemon.open(tmp_path / "dicc.db")
+    cache.insert_row(daemon.con, create_query("test", "dictionary"), RESPONSE)
+
+    socket_path = tmp_path / "daemon.sock"
+    server = DaemonServer(socket_path, daemon)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+
+    try:
+        output = client.search(["test"], "dictionary", 1, 60, socket_path=socket_path)
+        pong = client.request({"command": "ping"}, socket_path)
+        stats = client.request({"command": "stats"}, socket_path)
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+        daemon.close()
+
+    assert output is not None
+    assert "TEST" in output
+    assert "a trial" in output
+    assert {"status": "ok"} == pong
+    assert cache.cache_key("test", "dictionary") in daemon.hot_cache
+    assert stats is not None
+    assert 1 == stats["hot_cache"]["entries"]
@@ -1,51 +1,77 @@
+import pytest
+from dicc.config.main import get_config
 from dicc.display.common import (
-    _remove_tag,
-    _remove_tag_pair,
-    _stylize_at_tag,
+    clear_format_cache,
+    format_cache_info,
+    format_text,
+    get_formatter,
 )
-from rich.text import Text
+from rich.style import Style
+from rich.text import Span, Text
 
 
-def test_remove_tag() -> None:
-    input_text_1 = Text(r"an example {ldquo}")
-    input_text_2 = Text(r"{bc}an {rdquo}example")
-    input_text_3 = Text(r"{bc}an {bc}example{bc}")
+def test_format_text() -> None:
+    input_text_1 = Text(r"{bc}an {b}example{/b} {ldquo}quote{rdquo}")
+    input_text_2 = Text(r"{bc}see {sx|example||} and {bc}{d_link|other|other:1}")
+    input_text_3 = Text(r"{gloss}an example{/gloss} in {dx}see {dxt|it||}{/dx}")
+    input_text_4 = Text(r"an {it}example{/it} {p_br}")
 
-    removed_text_1 = Text("an example ")
-    removed_text_2 = Text("an {rdquo}example")
-    removed_text_3 = Text("an example")
+    formatted_text_1 = ': an example "quote"'
+    formatted_text_2 = ": see example and : other"
+    formatted_text_3 = "[an example] in \n — see it"
+    formatted_text_4 = "an example {p_br}"
 
-    assert removed_text_1 == _remove_tag(input_text_1, "{ldquo}")
-    assert removed_text_2 == _remove_tag(input_text_2, "{bc}")
-    assert removed_text_3 == _remove_tag(input_text_3, "{bc}")
+    assert formatted_text_1 == format_text(input_text_1).plain
+    assert formatted_text_2 == format_text(input_text_2).plain
+    assert formatted_text_3 == format_text(input_text_3).plain
+    assert formatted_text_4 == format_text(input_text_4).plain
 
 
-def test_remove_tag_pair() -> None:
-    input_text_1 = Text(r"an example {b}bold me{/b}")
-    input_text_2 = Text(r"an example {it}italic me{/it}")
-    input_text_3 = Text(r"an example {b}bold me{/b} and also {b}me{/b}")
-    input_text_4 = Text(r"an example {sup}sup me{/sup} and also {sup}me{/sup}")
+def test_format_text_styles() -> None:
+    input_text = Text(r"{bc}an {b}example{/b}", style="red")
 
-    removed_text_1 = Text("an example bold me")
-    removed_text_2 = Text("an example italic me")
-    removed_text_3 = Text("an example bold me and also me")
-    removed_text_4 = Text("an example sup me and also me")
+    spans = [
+        Span(2, 5, "red"),
+        Span(5, 12, "red"),
+        Span(5, 12, Style(bold=True)),
+        Span(0, 2, Style(bold=True)),
+    ]
 
-    assert removed_text_1 == _remove_tag_pair(input_text_1, "{b}", r"{/b}")
-    assert removed_text_2 == _remove_tag_pair(input_text_2, "{it}", r"{/it}")
-    assert removed_text_3 == _remove_tag_pair(input_text_3, "{b}", r"{/b}")
-    assert removed_text_4 == _remove_tag_pair(input_text_4, "{sup}", r"{/sup}")
+    assert spans == format_text(input_text).spans
 
 
-def test_stylize_at_tag() -> None:
-    input_text_1 = Text(r"an example {ldquo}")
-    input_text_2 = Text(r"{bc}an {rdquo}example")
-    input_text_3 = Text(r"{bc}an {bc}example{bc}")
+def test_formatter_rebuilt_on_config_change(monkeypatch: pytest.MonkeyPatch) -> None:
+    formatter = get_formatter()
+    assert formatter is get_formatter()
 
-    removed_text_1 = Text('an example "')
-    removed_text_2 = Text(":an {rdquo}example")
-    removed_text_3 = Text(":an :example:")
+    tags = get_config().style["tags"].copy()
+    tags["bold"] = "underline"
+    monkeypatch.setitem(get_config().style, "tags", tags)
 
-    assert removed_text_1 == _stylize_at_tag(input_text_1, "{ldquo}", Text('"'))
-    assert removed_text_2 == _stylize_at_tag(input_text_2, "{bc}", Text(":"))
-    assert removed_text_3 == _stylize_at_tag(input_text_3, "{bc}", Text(":"))
+    assert formatter is not get_formatter()
+    assert Style(underline=True) == get_formatter().pair_styles["b"]
+
+
+def test_many_occurrences() -> None:
+    count = 5000  # Deeper than the default recursion limit
+    assert ": a " * count == format_text(Text("{bc}a " * count)).plain
+
+    references = " ".join(f"{{sx|word{index}||}}" for index in range(count))
+    assert "word4999" in format_text(Text(references)).plain
+
+
+def test_format_text_memoized() -> None:
+    clear_format_cache()
+
+    first = format_text(Text("{bc}an {b}example{/b}"))
+    first.append("changed")
+    second = format_text(Text("{bc}an {b}example{/b}"))
+    assert ": an example" == second.plain
+
+    # Input styles are part of the key
+    styled = format_text(Text("{bc}an {b}example{/b}", style="red"))
+    assert Span(2, 5, "red") in styled.spans
+    assert Span(2, 5, "red") not in second.spans
+
+    info = format_cache_info()
+    assert (1, 2, 2) == (info.hits, info.misses, info.size)
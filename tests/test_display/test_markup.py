@@ -0,0 +1,33 @@
+from dicc.display.markup import Token, tokenize
+
+
+def test_tokenize() -> None:
+    """Test splitting markup into text and tag tokens."""
+    markup = "{bc}a {b}word{/b} {sx|run||}"
+
+    tokens = [
+        Token("open", "bc", (), 0, 4),
+        Token("text", "", (), 4, 6),
+        Token("open", "b", (), 6, 9),
+        Token("text", "", (), 9, 13),
+        Token("close", "b", (), 13, 17),
+        Token("text", "", (), 17, 18),
+        Token("open", "sx", ("run", "", ""), 18, 28),
+    ]
+
+    assert tokens == list(tokenize(markup))
+
+
+def test_tokenize_run_in() -> None:
+    """Test tokenizing the erroneous newlines around run ins."""
+    markup = "a (\nrun in\n )"
+
+    tokens = [
+        Token("text", "", (), 0, 2),
+        Token("run_in_open", "", (), 2, 4),
+        Token("text", "", (), 4, 10),
+        Token("run_in_close", "", (), 10, 13),
+    ]
+
+    assert tokens == list(tokenize(markup))
+    assert [] == list(tokenize(""))
@@ -0,0 +1,76 @@
+import json
+
+from dicc.display.collegiate import Collegiate
+from dicc.display.no_response import InvalidSearch
+from dicc.display.plain import (
+    format_json,
+    format_markdown,
+    format_plain,
+    strip_markup,
+)
+
+ENTRY = {
+    "meta": {"id": "run:1", "stems": ["run", "ran"]},
+    "hwi": {"hw": "run", "prs": [{"mw": "ˈrən"}]},
+    "fl": "verb",
+    "def": [
+        {
+            "vd": "intransitive verb",
+            "sseq": [
+                [
+                    [
+                        "sense",
+                        {
+                            "sn": "1 a",
+                            "dt": [
+                                ["text", "{bc}to go {it}faster{/it} {sx|walk||}"],
+                                ["vis", [{"t": "{wi}ran{/wi} to the *bus*"}]],
+                            ],
+                        },
+                    ]
+                ],
+                [["sense", {"sn": "2", "dt": [["text", "{bc}to flee"]]}]],
+            ],
+        }
+    ],
+    "date": "before 12th century",
+}
+
+
+def test_strip_markup() -> None:
+    markup = "{bc}to go {it}faster{/it} {sx|walk||}"
+    assert ": to go faster walk" == strip_markup(markup)
+    assert '"quote" [gloss] {p_br}' == strip_markup(
+        "{ldquo}quote{rdquo} {gloss}gloss{/gloss} {p_br}"
+    )
+
+
+def test_format_json() -> None:
+    result = [Collegiate.from_json(ENTRY, 0)]  # type: ignore [arg-type]
+
+    output = format_json("run", result)
+    assert output.endswith("}\n") and output.count("\n") == 1
+
+    data = json.loads(output)
+    (entry,) = data["entries"]
+    (definition,) = entry["definitions"]
+    assert ["1 a", "2"] == [sense["number"] for sense in definition["senses"]]
+    assert ": to go faster walk" == definition["senses"][0]["text"]
+    assert ["ran to the *bus*"] == definition["senses"][0]["examples"]
+    assert [] == data["suggestions"]
+
+
+def test_format_plain_and_markdown() -> None:
+    result = [Collegiate.from_json(ENTRY, 0)]  # type: ignore [arg-type]
+
+    plain = format_plain("run", result)
+    assert "  1 a : to go faster walk\n      // ran to the *bus*\n" in plain
+    assert "First Known Use: before 12th century" in plain
+
+    markdown = format_markdown("run", result)
+    assert "## 1. run : 1 *verb*" in markdown
+    assert "  - *ran to the \\*bus\\**" in markdown
+
+    suggestions = [InvalidSearch.from_json("rune", 0)]
+    assert "  rune\n" in format_plain("runx", suggestions)
+    assert "- rune\n" in format_markdown("runx", suggestions)
@@ -0,0 +1,124 @@
+import datetime
+import json
+import pathlib
+import sqlite3
+
+import pytest
+
+from dicc import cache
+from dicc.display.collegiate import Collegiate
+from dicc.hot_cache import HotCache
+from dicc.query.common import MerriamWebsterQuery
+
+_RUN = json.dumps(
+    [{"meta": {"id": "run:1", "stems": ["run", "ran"]}, "hwi": {"hw": "run"}}]
+).encode()
+
+
+def _query(word: str) -> MerriamWebsterQuery:
+    key = cache.cache_key(word, "dictionary")
+    return MerriamWebsterQuery(word, datetime.datetime.now(), "dictionary", key)
+
+
+def test_read_through(con: sqlite3.Connection) -> None:
+    cache.insert_row(con, _query("run"), _RUN)
+    hot = HotCache(max_size=1024)
+
+    assert hot.get_entry(con, "collegiate/run") is not None
+    con.execute("UPDATE queries SET response = x'00'")  # Can't be read from disk
+    entry = hot.get_entry(con, "collegiate/run")
+    assert entry is not None
+    assert isinstance(entry.items[0], Collegiate)
+    assert cache.response_hash(_RUN) == entry.response_hash
+    assert hot.get_entry(con, "collegiate/walk") is None
+
+    stats = hot.stats()
+    assert (1, 2, 1, len(_RUN)) == (stats.hits, stats.misses, stats.entries, stats.size)
+    assert 1 / 3 == stats.hit_ratio
+
+
+def test_stems(con: sqlite3.Connection) -> None:
+    hot = HotCache(max_size=1024)
+    hot.insert_row(con, _query("run"), _RUN)  # Written through
+
+    assert "collegiate/run" in hot
+    assert hot.get_entry(con, "collegiate/ran") is not None
+    assert "collegiate/ran" in hot
+
+    con.execute("UPDATE queries SET response = x'00'")
+    assert hot.get_entry(con, "collegiate/ran") is not None
+    assert hot.get_entry(con, "collegiate/ran", stems=False) is None
+
+
+def test_evict_by_size(con: sqlite3.Connection) -> None:
+    hot = HotCache(max_size=10)
+    hot.insert_row(con, _query("a"), b'["x", "y"]')
+    hot.insert_row(con, _query("b"), b'["z"]')
+    hot.insert_row(con, _query("c"), b'["' + b"x" * 9 + b'"]')  # Larger than all
+
+    assert "collegiate/a" not in hot
+    assert "collegiate/b" in hot
+    assert "collegiate/c" not in hot
+    assert 5 == hot.size
+
+
+def test_expired(con: sqlite3.Connection, monkeypatch: pytest.MonkeyPatch) -> None:
+    hot = HotCache(max_size=1024)
+    hot.insert_row(con, _query("run"), _RUN)
+
+    tomorrow = datetime.datetime.now() + datetime.timedelta(days=1)
+    monkeypatch.setattr(cache, "expiry", lambda max_age=None: tomorrow)
+
+    assert hot.get_entry(con, "collegiate/run") is None
+    assert "collegiate/run" not in hot
+    assert 0 == hot.size
+
+
+def test_deleted_by_another_process(tmp_path: pathlib.Path) -> None:
+    con = cache.connect(tmp_path / "dicc.db")
+    other = cache.connect(tmp_path / "dicc.db")
+
+    hot = HotCache(max_size=1024)
+    hot.insert_row(con, _query("run"), _RUN)
+    hot.insert_row(con, _query("walk"), b'["walks"]')
+    hot.get_entry(con, "collegiate/ran")
+
+    cache.delete_row(other, "collegiate/run")
+
+    assert hot.get_entry(con, "collegiate/walk") is not None
+    assert "collegiate/run" not in hot
+    assert "collegiate/ran" not in hot
+
+    cache.clear_cache(other)
+    assert hot.get_entry(con, "collegiate/walk") is None
+
+    con.close()
+    other.close()
+
+
+def test_flush(con: sqlite3.Connection) -> None:
+    hot = HotCache(max_size=1024)
+    hot.insert_row(con, _query("run"), _RUN)
+    for key in ("collegiate/run", "collegiate/ran", "collegiate/run"):
+        hot.get_entry(con, key)
+
+    assert 1 == cache.get_stats(con).hits  # The stem, read from the database
+    hot.flush(con)
+    assert 3 == cache.get_stats(con).hits
+    assert 0 == hot.unwritten
+
+
+def test_replaced_by_another_process(tmp_path: pathlib.Path) -> None:
+    con = cache.connect(tmp_path / "dicc.db")
+    other = cache.connect(tmp_path / "dicc.db")
+
+    hot = HotCache(max_size=1024)
+    hot.insert_row(con, _query("word"), b'["old"]')
+    cache.insert_row(other, _query("word"), b'["new"]')  # Upserted in place
+
+    entry = hot.get_entry(con, "collegiate/word")
+    assert entry is not None
+    assert cache.response_hash(b'["new"]') == entry.response_hash
+
+    con.close()
+    other.close()
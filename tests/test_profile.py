@@ -0,0 +1,29 @@
+import time
+
+from dicc import profile
+
+
+def test_stage_inactive() -> None:
+    with profile.stage("unused"):
+        pass
+
+    assert profile._active is None
+
+
+def test_stage_excludes_nested() -> None:
+    @profile.timed("inner")
+    def inner() -> int:
+        time.sleep(0.02)
+        return 1
+
+    with profile.profiling() as timings:
+        with profile.stage("outer"):
+            assert 1 == inner()
+            assert 1 == inner()
+
+    stages = timings.to_dict()["stages"]
+    assert 2 == stages["inner"]["calls"]
+    assert 0.04 <= stages["inner"]["seconds"]
+    assert stages["outer"]["seconds"] < 0.02
+    assert timings.total >= stages["inner"]["seconds"] + stages["outer"]["seconds"]
+    assert profile._active is None
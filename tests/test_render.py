@@ -0,0 +1,142 @@
+import asyncio
+import datetime
+import json
+import sqlite3
+
+import httpx
+import pytest
+
+from dicc import cache, url
+from dicc.config.main import get_config
+from dicc.display.plain import OutputFormat
+from dicc.hot_cache import HotCache, HotEntry
+from dicc.query import client, render
+from dicc.query.common import (
+    MerriamWebsterQuery,
+    create_query,
+    fetch_responses,
+    resolve_responses,
+)
+from dicc.terminal import console
+
+RESPONSE = json.dumps(
+    [{"meta": {"id": "test", "stems": ["test"]}, "hwi": {"hw": "test"}}]
+).encode()
+
+
+def _render(con: sqlite3.Connection, word: str) -> str:
+    query = create_query(word, "dictionary")
+    return "".join(render.render_responses(con, [query], {query.cache_key: RESPONSE}))
+
+
+def test_render_responses_cached(
+    con: sqlite3.Connection, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setitem(get_config().cache, "rendered", True)
+    query = create_query("test", "dictionary")
+    cache.insert_row(con, query._replace(timestamp=datetime.datetime.now()), RESPONSE)
+
+    output = _render(con, "test")
+    assert "TEST" in output
+
+    def fail(*args: object) -> None:
+        raise AssertionError("Rendered again")
+
+    monkeypatch.setattr(render, "parse_response", fail)
+    assert output == _render(con, "test")
+
+    # Different settings are rendered again
+    monkeypatch.setattr(console, "width", console.width + 1)
+    with pytest.raises(AssertionError):
+        _render(con, "test")
+
+
+def test_render_responses_uncached(con: sqlite3.Connection) -> None:
+    assert not get_config().cache.get("rendered", False)
+
+    assert "TEST" in _render(con, "test")
+    assert 0 == con.execute("SELECT COUNT(*) FROM rendered").fetchone()[0]
+
+
+def test_render_parsed(
+    con: sqlite3.Connection, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    query = create_query("test", "dictionary")
+    entry = HotCache(max_size=1024).insert_row(con, query, RESPONSE)
+
+    def output(response: bytes | HotEntry, output_format: OutputFormat) -> str:
+        responses = {query.cache_key: response}
+        return "".join(render.render_responses(con, [query], responses, output_format))
+
+    expected = {"rich": output(RESPONSE, "rich"), "json": output(RESPONSE, "json")}
+
+    def fail(*args: object) -> None:
+        raise AssertionError("Parsed again")
+
+    monkeypatch.setattr(render, "parse_response", fail)
+    assert expected == {"rich": output(entry, "rich"), "json": output(entry, "json")}
+
+
+def test_decoded_once(con: sqlite3.Connection, monkeypatch: pytest.MonkeyPatch) -> None:
+    decoded = []
+    loads = json.loads
+
+    def counted_loads(data: bytes) -> object:
+        decoded.append(data)
+        return loads(data)
+
+    monkeypatch.setattr(json, "loads", counted_loads)
+    query = create_query("test", "dictionary")
+    responses = resolve_responses([query], con, lambda misses: [RESPONSE] * len(misses))
+
+    assert "TEST" in "".join(render.render_responses(con, [query], responses))
+    assert [RESPONSE] == decoded
+
+
+def test_fetch_responses_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    def respond(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/down":
+            raise httpx.ConnectError("Unreachable", request=request)
+        status = 404 if request.url.path == "/gone" else 200
+        return httpx.Response(status, content=b"[]")
+
+    transport = httpx.MockTransport(respond)
+    monkeypatch.setattr(url, "build_url", lambda word, method: f"https://mw/{word}")
+    monkeypatch.setattr(
+        client, "async_client", lambda: httpx.AsyncClient(transport=transport)
+    )
+
+    queries = [create_query(word, "dictionary") for word in ("test", "gone", "down")]
+    fetched = asyncio.run(fetch_responses(queries, 2))
+
+    assert b"[]" == fetched[0]
+    assert isinstance(fetched[1], httpx.HTTPStatusError)
+    assert isinstance(fetched[2], httpx.ConnectError)
+
+
+def test_partial_failure(con: sqlite3.Connection) -> None:
+    queries = [create_query(word, "dictionary") for word in ("test", "gone", "down")]
+    request = httpx.Request("GET", "https://mw/gone")
+    not_found = httpx.Response(404, request=request)
+
+    def fetch(misses: list[MerriamWebsterQuery]) -> list[bytes | httpx.HTTPError]:
+        return [
+            RESPONSE,
+            httpx.HTTPStatusError("Not found", request=request, response=not_found),
+            httpx.ConnectError("Unreachable"),
+        ]
+
+    responses = resolve_responses(queries, con, fetch)
+
+    assert cache.get_row(con, queries[0].cache_key) is not None
+    assert cache.get_row(con, queries[1].cache_key) is None
+    assert 2 == cache.get_api_usage(con, "dictionary")  # Not the unreachable one
+
+    output = "".join(render.render_responses(con, queries, responses, "json"))
+    lines = [json.loads(line) for line in output.splitlines()]
+    assert ["test", "gone", "down"] == [line["word"] for line in lines]
+    assert "entries" in lines[0]
+    assert "Unreachable" == lines[2]["error"]
+    assert "Could not look up gone" in "".join(
+        render.render_responses(con, queries[1:2], responses)
+    )
@@ -0,0 +1,83 @@
+import json
+import pathlib
+import subprocess
+import sys
+from typing import NamedTuple
+
+import pytest
+
+from benchmarks import startup
+
+# Prints the modules imported by a command, after running it
+_PROBE = """\
+import json, sys
+from dicc.cli.main import app
+try:
+    app(sys.argv[1:], prog_name="dicc")
+except SystemExit:
+    pass
+config = sys.modules.get("dicc.config.main")
+loaded = config is not None and config._config is not None
+print(json.dumps({"modules": sorted(sys.modules), "config": loaded}), file=sys.stderr)
+"""
+
+NETWORK = {"httpx", "asyncio", "dotenv", "dicc.url", "dicc.query.client"}
+DISPLAY = {"rich.table", "rich.tree", "dicc.display.collegiate"}
+
+
+class Imported(NamedTuple):
+    modules: set[str]
+    config: bool  # Whether the configuration was loaded
+
+
+@pytest.fixture
+def home(tmp_path: pathlib.Path) -> pathlib.Path:
+    startup.prepare_home(tmp_path)
+    return tmp_path
+
+
+def _run(home: pathlib.Path, *arguments: str, **environment: str) -> Imported:
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE, *arguments],
+        env={**startup.environment(home), **environment},
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    data = json.loads(result.stderr.splitlines()[-1])
+    return Imported(set(data["modules"]), data["config"])
+
+
+def test_help(home: pathlib.Path) -> None:
+    imported = _run(home, "--help")
+
+    assert not imported.config
+    assert not NETWORK & imported.modules
+    assert "dicc.cache" not in imported.modules
+
+
+def test_completion(home: pathlib.Path) -> None:
+    completion = {
+        "_DICC_COMPLETE": "complete_bash",
+        "COMP_WORDS": "dicc search --method ",
+        "COMP_CWORD": "3",
+    }
+    imported = _run(home, **completion)
+
+    assert not imported.config
+    assert "dicc.cache" not in imported.modules
+
+
+@pytest.mark.parametrize("command", ["clear", "stats", "show"])
+def test_cache_commands(home: pathlib.Path, command: str) -> None:
+    imported = _run(home, "cache", command)
+
+    assert not (NETWORK | DISPLAY) & imported.modules
+
+
+def test_cache_hit(home: pathlib.Path) -> None:
+    imported = _run(home, "search", startup.CACHED_WORD, "--no-daemon")
+
+    assert "dicc.display.collegiate" in imported.modules
+    assert not NETWORK & imported.modules
@@ -0,0 +1,67 @@
+import json
+import time
+from collections.abc import Iterable, Iterator
+
+from dicc import cache
+from dicc.query import stream
+
+
+def _words(lines: Iterable[str]) -> list[str]:
+    return [json.loads(line)["word"] for line in lines]
+
+
+def test_stream_ordered(fetches: list[str]) -> None:
+    lines = list(stream.stream_search(["slow\n", "\n", "fast\n"], "dictionary", 2))
+
+    assert ["slow", "fast"] == _words(lines)
+    assert ["slows"] == json.loads(lines[0])["suggestions"]
+
+
+def test_stream_unordered(fetches: list[str]) -> None:
+    words = ["slow", "fast"]
+    lines = list(stream.stream_search(words, "dictionary", 2, ordered=False))
+
+    assert ["fast", "slow"] == _words(lines)
+
+
+def test_stream_duplicates_and_errors(fetches: list[str]) -> None:
+    words = ["word", "word", "missing", "Word"]
+    lines = list(stream.stream_search(words, "dictionary", 4))
+
+    assert ["word", "word", "missing", "Word"] == _words(lines)
+    assert "Unreachable" == json.loads(lines[2])["error"]
+    assert ["word", "missing"] == sorted(fetches, reverse=True)
+
+    # Cached by the first run
+    assert ["word"] == _words(stream.stream_search(["word"], "dictionary", 1))
+    assert 1 == fetches.count("word")
+
+
+def test_stream_bounded(fetches: list[str]) -> None:
+    read = 0
+
+    def lines() -> Iterator[str]:
+        nonlocal read
+        for index in range(100):
+            read += 1
+            yield f"word{index}"
+
+    results = stream.stream_search(lines(), "dictionary", 3)
+    next(results)
+    time.sleep(0.1)
+
+    # Three words in flight, and one waiting for a slot
+    assert read <= 5
+    assert 99 == len(list(results))
+
+
+def test_stream_api_usage(fetches: list[str]) -> None:
+    words = ["word", "forbidden", "missing"]
+    lines = list(stream.stream_search(words, "dictionary", 3))
+
+    assert "Forbidden" == json.loads(lines[1])["error"]
+
+    # Refused requests were sent, and count against the quota
+    con = cache.connect()
+    assert 2 == cache.get_api_usage(con, "dictionary")
+    con.close()
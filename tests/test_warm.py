@@ -0,0 +1,82 @@
+import datetime
+import pathlib
+import sqlite3
+import time
+
+from dicc import cache
+from dicc.query import warm
+from dicc.query.common import create_query
+
+
+def test_plan_warm(con: sqlite3.Connection) -> None:
+    cache.insert_row(con, create_query("cached", "dictionary"), b"[]")
+    cache.record_api_usage(con, "dictionary", 8)
+
+    words = ["cached", "one", "One", "two", "three"]
+    plan = warm.plan_warm(con, words, "dictionary", quota=10)
+
+    assert ["one", "two"] == [query.word for query in plan.queries]
+    assert (1, 1) == (plan.cached, plan.deferred)
+
+
+def test_warm(con: sqlite3.Connection, fetches: list[str]) -> None:
+    queries = [create_query(word, "dictionary") for word in ["a", "missing", "b"]]
+
+    results = list(warm.warm(con, queries, 2, rate=0, batch_size=1))
+
+    failed = [result.query.word for result in results if result.error]
+    assert ["missing"] == failed
+    assert {"collegiate/a", "collegiate/b"} == cache.cached_keys(
+        con, [query.cache_key for query in queries]
+    )
+    assert 2 == cache.get_api_usage(con, "dictionary")
+
+
+def test_warm_interrupted(con: sqlite3.Connection, fetches: list[str]) -> None:
+    queries = [create_query(word, "dictionary") for word in ["a", "b", "c"]]
+
+    results = warm.warm(con, queries, 1, rate=0)
+    next(results)
+    results.close()
+
+    # Fetched before stopping, though the batch was not full
+    plan = warm.plan_warm(con, [query.word for query in queries], "dictionary", 10)
+    assert 1 <= plan.cached
+    assert 3 == plan.cached + len(plan.queries)
+
+
+def test_rate_limiter() -> None:
+    limiter = warm.RateLimiter(50)
+
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.wait()
+
+    assert 0.1 <= time.monotonic() - start
+
+
+def test_warm_cli(tmp_path: pathlib.Path, fetches: list[str]) -> None:
+    from typer.testing import CliRunner
+
+    from dicc.cli.main import app
+
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("one\ntwo\n\nmissing\n", encoding="utf-8")
+
+    result = CliRunner().invoke(app, ["cache", "warm", str(wordlist), "--quota", "2"])
+    assert 0 == result.exit_code, result.output
+    assert "run again tomorrow" in result.output
+
+    db = sqlite3.connect(tmp_path / "dicc.db")
+    assert 2 == cache.get_api_usage(db, "dictionary", datetime.date.today())
+    db.close()
+
+
+def test_warm_cli_missing_file(tmp_path: pathlib.Path) -> None:
+    from typer.testing import CliRunner
+
+    from dicc.cli.main import app
+
+    result = CliRunner().invoke(app, ["cache", "warm", str(tmp_path / "none.txt")])
+    assert 2 == result.exit_code
+    assert "Invalid value" in result.output  # A usage error, not a traceback